@@ -0,0 +1,27 @@
+# app/api/internal.py
+"""Operational endpoints, outside the versioned public API."""
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+from app.config import settings
+from app.core.telemetry import stats
+from app.services.registry import ingest_jobs, metrics_service
+
+router = APIRouter()
+
+
+@router.get("/stats")
+def internal_stats(format: str = Query("json", description="json or prometheus"),
+                   x_internal_token: Optional[str] = Header(None)):
+    """Route latencies, metric cache, dataset, model and predict-stage timings of this worker."""
+    if settings.INTERNAL_STATS_TOKEN and x_internal_token != settings.INTERNAL_STATS_TOKEN:
+        raise HTTPException(status_code=403, detail="Forbidden")
+    cache = metrics_service.cache.stats()
+    for key in ("entries", "bytes", "hits", "misses", "hit_rate"):
+        stats.set_gauge(f"metrics_cache_{key}", cache[key])
+    stats.set_gauge("ingest_pending", ingest_jobs.pending())
+    if format == "prometheus":
+        return PlainTextResponse(stats.prometheus(), media_type="text/plain; version=0.0.4")
+    if format != "json":
+        raise HTTPException(status_code=400, detail="format must be json or prometheus")
+    return {**stats.snapshot(), "cache": cache}
@@ -1,16 +1,37 @@
 ﻿# Ingest endpoints (placeholder)
 
-from fastapi import APIRouter, File, UploadFile, HTTPException
-from app.services.ingest_service import IngestService
-from app.schemas.pydantic_schemas import IngestResponse
+from fastapi import APIRouter, File, UploadFile, HTTPException, Query
+from typing import Literal
+from app.services.job_service import IngestBusy
+from app.services.registry import ingest_jobs as jobs
+from app.schemas.pydantic_schemas import IngestJobResponse
 
 router = APIRouter()
-service = IngestService()
 
-@router.post("/ingest_csv", response_model=IngestResponse)
-async def ingest_csv(file: UploadFile = File(...)):
+@router.post("/ingest_csv", response_model=IngestJobResponse, status_code=202)
+async def ingest_csv(file: UploadFile = File(...), mode: Literal["replace", "append"] = Query("replace", description="replace the dataset or append new rows")):
     try:
-        df = await service.ingest_csv(file)
-        return IngestResponse(rows_loaded=len(df))
+        job = await jobs.submit(file, mode)
+        return IngestJobResponse(**job.to_dict())
+    except IngestBusy as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/rescore", response_model=IngestJobResponse, status_code=202)
+def rescore():
+    """Score the stored rows that have no prediction from the current model yet."""
+    try:
+        job = jobs.submit_rescore()
+        return IngestJobResponse(**job.to_dict())
+    except IngestBusy as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
+
+
+@router.get("/jobs/{job_id}", response_model=IngestJobResponse)
+def ingest_job(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return IngestJobResponse(**job.to_dict())
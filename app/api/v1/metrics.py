@@ -1,41 +1,109 @@
 ﻿# Metrics endpoints (placeholder)
 
-from fastapi import APIRouter, Query, HTTPException
-from typing import Optional
-from app.services.metrics_service import MetricsService
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response
+from typing import Any, Callable, Dict, Optional
+import hashlib
+import json
+from app.services.registry import metrics_service as service
 
 router = APIRouter()
-service = MetricsService()
+
+
+def segment(airline: Optional[str] = Query(None, description="Airline/brand (case-insensitive)"),
+            start: Optional[str] = Query(None, description="First timestamp included (ISO date/datetime)"),
+            end: Optional[str] = Query(None, description="First timestamp excluded (ISO date/datetime)"),
+            source: str = Query('label', description="Sentiment to count: 'label' (dataset) or 'prediction' (model)")) -> Dict[str, Any]:
+    """Filters shared by every metrics endpoint."""
+    return {"airline": airline, "start": start, "end": end, "source": source}
+
+
+def _run(fn: Callable, *args, **kwargs):
+    try:
+        return fn(*args, **kwargs)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/summary")
-def summary():
-    return service.sentiment_summary()
+def summary(seg: Dict[str, Any] = Depends(segment)):
+    return _run(service.sentiment_summary, **seg)
 
 
 @router.get("/time_series")
-def time_series(freq: Optional[str] = Query('D', description="Aggregation frequency: D,W,M")):
-    return service.sentiment_time_series(freq)
+def time_series(freq: Optional[str] = Query('D', description="Aggregation frequency: D,W,M"),
+                seg: Dict[str, Any] = Depends(segment)):
+    return _run(service.sentiment_time_series, freq, **seg)
 
 
 @router.get("/keywords")
-def keywords(sentiment: Optional[str] = Query(None), top: int = Query(50)):
-    return {"keywords": service.top_keywords(sentiment, top)}
+def keywords(sentiment: Optional[str] = Query(None), top: int = Query(50), seg: Dict[str, Any] = Depends(segment)):
+    return {"keywords": _run(service.top_keywords, sentiment, top, **seg)}
 
 
 @router.get("/topics")
-def topics(sentiment: str = Query('negative')):
-    return {"topics": service.topic_breakdown(sentiment)}
+def topics(sentiment: str = Query('negative'), seg: Dict[str, Any] = Depends(segment)):
+    return {"topics": _run(service.topic_breakdown, sentiment, **seg)}
 
 
 @router.get("/influencers")
-def influencers(sentiment: Optional[str] = Query(None), limit: int = Query(20), sort_by: Optional[str] = Query('count')):
-    return {"influencers": service.top_influencers(sentiment, limit, sort_by)}
+def influencers(sentiment: Optional[str] = Query(None), limit: int = Query(20), sort_by: Optional[str] = Query('count'),
+                seg: Dict[str, Any] = Depends(segment)):
+    return {"influencers": _run(service.top_influencers, sentiment, limit, sort_by, **seg)}
 
 
 @router.get("/geo")
-def geo(top: int = Query(100)):
-    return {"geo": service.geo_distribution(top)}
+def geo(top: int = Query(100), seg: Dict[str, Any] = Depends(segment)):
+    return {"geo": _run(service.geo_distribution, top, **seg)}
+
+
+def _etag(version: str, params: Dict[str, Any]) -> str:
+    digest = hashlib.sha1(json.dumps([version, params], sort_keys=True, default=str).encode()).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match test: `*` or any listed tag equal to `etag` (weak comparison)."""
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+@router.get("/dashboard")
+def dashboard(request: Request, response: Response,
+              freq: str = Query('D', description="Time series frequency: D,W,M"),
+              keywords_sentiment: Optional[str] = Query(None), keywords_top: int = Query(50),
+              topics_sentiment: str = Query('negative'), influencers_limit: int = Query(20),
+              influencers_sort: str = Query('count'), geo_top: int = Query(100),
+              seg: Dict[str, Any] = Depends(segment)):
+    """Summary, time series, keywords, topics, influencers and geo in one response.
+
+    The ETag covers the dataset version and the parameters, so a client that
+    sends it back in If-None-Match gets a 304 until the data changes.
+    """
+    params = {"freq": freq, "keywords_sentiment": keywords_sentiment, "keywords_top": keywords_top,
+              "topics_sentiment": topics_sentiment, "influencers_limit": influencers_limit,
+              "influencers_sort": influencers_sort, "geo_top": geo_top, **seg}
+    version = _run(service.dataset_version, seg["source"])
+    etag = _etag(version, params)
+    if _etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    data = _run(service.dashboard, **params)
+    # the data may come from a newer version than the one checked above
+    response.headers["ETag"] = _etag(data["version"], params)
+    response.headers["Cache-Control"] = "no-cache"
+    return data
+
+
+@router.get("/airlines")
+def airlines(start: Optional[str] = Query(None), end: Optional[str] = Query(None)):
+    """Tweets per airline, plus the dataset's date range for the segment filters."""
+    return {"airlines": _run(service.airline_counts, start, end), "date_range": service.date_range()}
 
 
 @router.post("/recompute")
@@ -1,16 +1,24 @@
 ﻿# Prediction endpoints (placeholder)
 
 from fastapi import APIRouter, HTTPException
-from app.schemas.pydantic_schemas import PredictRequest, PredictResponse
-from app.services.sentiment_service import SentimentService
+from app.schemas.pydantic_schemas import PredictRequest, PredictResponse, PredictBatchRequest, PredictBatchResponse
+from app.services.registry import sentiment_service as service
 
 router = APIRouter()
-service = SentimentService()
 
 @router.post("/predict", response_model=PredictResponse)
-def predict(req: PredictRequest):
+async def predict(req: PredictRequest):
     try:
-        label, score = service.predict(req.text)
+        label, score = await service.predict_async(req.text)
         return PredictResponse(label=label, score=score)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/batch", response_model=PredictBatchResponse)
+def predict_batch(req: PredictBatchRequest):
+    try:
+        preds = service.predict_batch(req.texts)
+        return PredictBatchResponse(predictions=[PredictResponse(label=l, score=s) for l, s in preds])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -3,6 +3,15 @@ from pathlib import Path
 import os
 
 
+def _usable_cpus() -> int:
+    """CPUs this process may run on (the affinity mask, not the host's core count)."""
+    try:
+        return len(os.sched_getaffinity(0)) or 1
+    except AttributeError:
+        # sched_getaffinity only exists on Linux
+        return os.cpu_count() or 1
+
+
 # Simple settings object that does not require pydantic; reads from env with sensible defaults.
 class Settings:
     def __init__(self):
@@ -10,6 +19,45 @@ class Settings:
         # Default data path inside the repo (app/data)
         default_data = self.PROJECT_ROOT / "app" / "data" / "df_twitter_prueba4.csv"
         self.DATA_PATH: Path = Path(os.getenv("DATA_PATH", default_data))
+        # columnar snapshot (Parquet parts) written at ingest and read by the metrics
+        self.STORE_PATH: Path = Path(os.getenv("STORE_PATH", str(self.PROJECT_ROOT / "app" / "data" / "store")))
+        # seconds between checks for a dataset committed by another worker
+        self.STORE_CHECK_INTERVAL: float = float(os.getenv("STORE_CHECK_INTERVAL", "1.0"))
+        # metrics result cache: `memory` (per process) or `sqlite` (shared by the workers on the box)
+        self.CACHE_BACKEND: str = os.getenv("CACHE_BACKEND", "memory")
+        self.CACHE_PATH: Path = Path(os.getenv("CACHE_PATH", str(self.PROJECT_ROOT / "app" / "data" / "metrics_cache.sqlite")))
+        self.CACHE_MAX_BYTES: int = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+        self.CACHE_TTL: float = float(os.getenv("CACHE_TTL", "3600"))
+        # rows parsed per chunk when streaming an uploaded CSV into the store
+        self.INGEST_CHUNK_ROWS: int = int(os.getenv("INGEST_CHUNK_ROWS", "50000"))
+        # background ingest workers
+        self.INGEST_WORKERS: int = int(os.getenv("INGEST_WORKERS", "1"))
+        # uploads accepted but not finished (spooling, queued or running); more are refused with 429
+        self.INGEST_MAX_PENDING: int = int(os.getenv("INGEST_MAX_PENDING", "4"))
+        # rescoring of the stored dataset with the model: pool processes (0 = in the job thread) and rows per task.
+        # Each process imports the app and loads the model, so the default is the usable CPUs capped at 2
+        self.RESCORE_WORKERS: int = int(os.getenv("RESCORE_WORKERS", str(min(_usable_cpus(), 2))))
+        self.RESCORE_BATCH_ROWS: int = int(os.getenv("RESCORE_BATCH_ROWS", "20000"))
+        # queue a rescoring job after every successful ingest
+        self.RESCORE_ON_INGEST: bool = os.getenv("RESCORE_ON_INGEST", "0").lower() not in ("0", "false", "no")
+        # load the model and dataset at startup instead of on the first request
+        self.WARMUP_ON_STARTUP: bool = os.getenv("WARMUP_ON_STARTUP", "1").lower() not in ("0", "false", "no")
+        # memory-map the model arrays so workers share them through the page cache
+        self.MODEL_MMAP: bool = os.getenv("MODEL_MMAP", "1").lower() not in ("0", "false", "no")
+        # use the NumPy scorer exported next to the model (model.npz) instead of the sklearn pipeline
+        self.FAST_SCORER: bool = os.getenv("FAST_SCORER", "1").lower() not in ("0", "false", "no")
+        # /predict coalescing: wait up to this many ms for other requests, flush early at PREDICT_MAX_BATCH texts
+        self.PREDICT_BATCH_WINDOW_MS: float = float(os.getenv("PREDICT_BATCH_WINDOW_MS", "5"))
+        self.PREDICT_MAX_BATCH: int = int(os.getenv("PREDICT_MAX_BATCH", "256"))
+        # city table used to geocode tweet_location, and the persistent memo of its resolutions
+        self.GEOCODER_TABLE_PATH: Path = Path(os.getenv("GEOCODER_TABLE_PATH", str(self.PROJECT_ROOT / "app" / "data" / "usa_cities.csv")))
+        self.GEOCODER_CACHE_PATH: Path = Path(os.getenv("GEOCODER_CACHE_PATH", str(self.PROJECT_ROOT / "app" / "data" / "geocode_cache.json")))
+        # sampling profiler: requests slower than PROFILE_SLOW_MS dump folded stacks to PROFILE_DIR (0 = off)
+        self.PROFILE_SLOW_MS: float = float(os.getenv("PROFILE_SLOW_MS", "0"))
+        self.PROFILE_INTERVAL_MS: float = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+        self.PROFILE_DIR: Path = Path(os.getenv("PROFILE_DIR", str(self.PROJECT_ROOT / "app" / "data" / "profiles")))
+        # when set, /internal/stats requires the X-Internal-Token header with this value
+        self.INTERNAL_STATS_TOKEN: str = os.getenv("INTERNAL_STATS_TOKEN", "")
         # model and vectorizer paths inside the app core
         self.MODEL_PATH: Path = Path(os.getenv("MODEL_PATH", str(self.PROJECT_ROOT / "app" / "core" / "model.joblib")))
         self.VECTORIZER_PATH: Path = Path(os.getenv("VECTORIZER_PATH", str(self.PROJECT_ROOT / "app" / "core" / "vectorizer.joblib")))
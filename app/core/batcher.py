@@ -0,0 +1,56 @@
+# app/core/batcher.py
+"""Async micro-batching.
+
+Requests that arrive within a short window are collected and handed to a
+vectorized function in one call (run in the default executor), then each
+caller gets its own result back. Used to turn many concurrent single-text
+predictions into one `predict_proba` call.
+"""
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+import asyncio
+
+
+class MicroBatcher:
+    def __init__(self, fn: Callable[[List[Any]], Sequence[Any]], window_ms: float, max_batch: int):
+        self.fn = fn
+        self.window = max(window_ms, 0.0) / 1000.0
+        self.max_batch = max(int(max_batch), 1)
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def submit(self, item: Any) -> Any:
+        """Queue `item` for the next batch and wait for its result."""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # futures belong to one loop; a new loop (e.g. a restarted test client) starts clean
+            self._loop, self._pending, self._timer = loop, [], None
+        fut = loop.create_future()
+        self._pending.append((item, fut))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await fut
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            self._loop.create_task(self._run(batch))
+
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future]]):
+        items = [item for item, _ in batch]
+        try:
+            results = await self._loop.run_in_executor(None, self.fn, items)
+        except Exception as e:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        for (_, fut), res in zip(batch, results):
+            # the caller may have been cancelled (client disconnect) while waiting
+            if not fut.done():
+                fut.set_result(res)
@@ -0,0 +1,218 @@
+# app/core/cache.py
+"""Size-bounded result cache with TTL.
+
+Two backends behind the same interface: an in-process LRU (default) and a
+SQLite file that every uvicorn worker on the box can share. Callers put
+the dataset version in their keys, so an ingest invalidates old entries
+simply by changing the version; stale entries age out by LRU/TTL.
+Concurrent misses on one key within a process are computed once.
+"""
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Tuple
+import logging
+import pickle
+import sqlite3
+import threading
+import time
+from app.config import settings
+from app.core.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class CacheBackend(ABC):
+    """Interface shared by the cache backends."""
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._flight = SingleFlight("cache")
+        self._stats_lock = threading.Lock()
+
+    @abstractmethod
+    def get(self, key: str) -> Any:
+        """Cached value for `key`, or the module's _MISSING sentinel."""
+
+    @abstractmethod
+    def set(self, key: str, value: Any):
+        """Store `value` under `key`, evicting entries past max_bytes."""
+
+    @abstractmethod
+    def clear(self):
+        """Drop every entry."""
+
+    @abstractmethod
+    def size(self) -> Tuple[int, int]:
+        """(entries, bytes) currently stored."""
+
+    def _count(self, hit: bool):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        """Cached value for `key`; on a miss one caller computes it and concurrent ones wait.
+
+        Cached values are shared between callers and must not be mutated.
+        """
+        value = self.get(key)
+        if value is not _MISSING:
+            self._count(True)
+            return value
+
+        def fill():
+            # a leader that finished just before this one started may have stored it already
+            value = self.get(key)
+            if value is not _MISSING:
+                self._count(True)
+                return value
+            self._count(False)
+            value = compute()
+            self.set(key, value)
+            return value
+        return self._flight.do(key, fill)
+
+    def stats(self) -> Dict[str, Any]:
+        entries, nbytes = self.size()
+        with self._stats_lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            "backend": type(self).__name__,
+            "entries": entries,
+            "bytes": nbytes,
+            "max_bytes": self.max_bytes,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+        }
+
+
+class MemoryCache(CacheBackend):
+    """Per-process LRU bounded by the pickled size of the values."""
+
+    def __init__(self, max_bytes: int, ttl: float):
+        super().__init__(max_bytes, ttl)
+        self._data: "OrderedDict[str, Tuple[Any, int, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return _MISSING
+            value, size, expires = item
+            if expires < time.time():
+                del self._data[key]
+                self._bytes -= size
+                return _MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any):
+        size = len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._data[key] = (value, size, time.time() + self.ttl)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted, _) = self._data.popitem(last=False)
+                self._bytes -= evicted
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def size(self) -> Tuple[int, int]:
+        with self._lock:
+            return len(self._data), self._bytes
+
+
+class SQLiteCache(CacheBackend):
+    """Cache stored in a SQLite file, shared by every worker that opens it."""
+
+    def __init__(self, path: Path, max_bytes: int, ttl: float):
+        super().__init__(max_bytes, ttl)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value BLOB, size INTEGER, expires REAL, accessed REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)")
+
+    def _conn(self) -> sqlite3.Connection:
+        # one connection per thread; sqlite3 connections are not shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=5)
+        return conn
+
+    def get(self, key: str) -> Any:
+        conn = self._conn()
+        row = conn.execute("SELECT value, expires FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return _MISSING
+        blob, expires = row
+        with conn:
+            if expires < time.time():
+                conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                return _MISSING
+            conn.execute("UPDATE cache SET accessed = ? WHERE key = ?", (time.time(), key))
+        return pickle.loads(blob)
+
+    def set(self, key: str, value: Any):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) > self.max_bytes:
+            return
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, size, expires, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, blob, len(blob), now + self.ttl, now),
+            )
+            conn.execute("DELETE FROM cache WHERE expires < ?", (now,))
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+            if total > self.max_bytes:
+                # evict least recently used rows until the total fits again
+                excess = total - self.max_bytes
+                for k, size in conn.execute("SELECT key, size FROM cache ORDER BY accessed").fetchall():
+                    if excess <= 0:
+                        break
+                    conn.execute("DELETE FROM cache WHERE key = ?", (k,))
+                    excess -= size
+
+    def clear(self):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM cache")
+
+    def size(self) -> Tuple[int, int]:
+        row = self._conn().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+        return int(row[0]), int(row[1])
+
+
+def make_cache() -> CacheBackend:
+    """Backend selected by CACHE_BACKEND (`memory` or `sqlite`)."""
+    if settings.CACHE_BACKEND == "sqlite":
+        return SQLiteCache(settings.CACHE_PATH, settings.CACHE_MAX_BYTES, settings.CACHE_TTL)
+    if settings.CACHE_BACKEND != "memory":
+        logger.warning("CACHE_BACKEND=%s desconocido, usando memoria", settings.CACHE_BACKEND)
+    return MemoryCache(settings.CACHE_MAX_BYTES, settings.CACHE_TTL)
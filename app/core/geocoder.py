@@ -0,0 +1,131 @@
+# app/core/geocoder.py
+"""Free-text location -> (lat, lon) against the bundled city table.
+
+A location is resolved in three steps, cheapest first: the whole
+normalized string as a dict key, then its word n-grams (longest first, so
+`kansas city` wins over `kansas`), and only then a substring scan over the
+city names. Resolutions, misses included, are memoized in a JSON file so
+each distinct location pays for the lookup once across restarts.
+"""
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import pandas as pd
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+Coords = Tuple[float, float]
+
+_WORD = re.compile(r"[^\W_]+")
+
+
+def normalize_location(text: str) -> str:
+    """Lowercase words separated by single spaces (`New York, NY` -> `new york ny`)."""
+    return " ".join(_WORD.findall(text.lower()))
+
+
+class Geocoder:
+    def __init__(self, table_path: Path | None = None, cache_path: Path | None = None):
+        self.table_path = Path(table_path) if table_path else settings.GEOCODER_TABLE_PATH
+        self.cache_path = Path(cache_path) if cache_path else settings.GEOCODER_CACHE_PATH
+        self.cities: Dict[str, Coords] | None = None
+        self.max_words = 1
+        # (name without spaces, name) longest first, for the substring fallback
+        self._by_length: List[Tuple[str, str]] = []
+        self._memo: Dict[str, Optional[Coords]] = {}
+        self._table_sha1 = ""
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def _ensure_loaded(self):
+        if self.cities is not None:
+            return
+        with self._lock:
+            if self.cities is not None:
+                return
+            cities: Dict[str, Coords] = {}
+            try:
+                table = pd.read_csv(self.table_path)
+                self._table_sha1 = hashlib.sha1(self.table_path.read_bytes()).hexdigest()
+                for city, lat, lon in zip(table["city"].astype(str), table["lat"], table["lon"]):
+                    # first row wins, as in the old client-side lookup
+                    cities.setdefault(normalize_location(city), (float(lat), float(lon)))
+            except (OSError, KeyError, ValueError) as e:
+                logger.warning("No se pudo cargar la tabla de ciudades %s: %s", self.table_path, e)
+            cities.pop("", None)
+            self.max_words = max((k.count(" ") + 1 for k in cities), default=1)
+            self._by_length = sorted(((c.replace(" ", ""), c) for c in cities), key=lambda t: len(t[0]), reverse=True)
+            self._memo = self._read_cache()
+            self.cities = cities
+
+    def _read_cache(self) -> Dict[str, Optional[Coords]]:
+        try:
+            data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        # resolutions made against another city table are thrown away
+        if data.get("table") != self._table_sha1:
+            return {}
+        return {k: tuple(v) if v else None for k, v in data.get("entries", {}).items()}
+
+    def save(self):
+        """Write the memo to GEOCODER_CACHE_PATH if new locations were resolved."""
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = {"table": self._table_sha1, "entries": dict(self._memo)}
+            self._dirty = False
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(payload), encoding="utf-8")
+            os.replace(tmp, self.cache_path)
+        except OSError as e:
+            logger.warning("No se pudo guardar la caché de geocodificación %s: %s", self.cache_path, e)
+
+    def _lookup(self, key: str) -> Optional[Coords]:
+        cities = self.cities
+        hit = cities.get(key)
+        if hit is not None:
+            return hit
+        words = key.split(" ")
+        for n in range(min(self.max_words, len(words)), 0, -1):
+            for i in range(len(words) - n + 1):
+                hit = cities.get(" ".join(words[i:i + n]))
+                if hit is not None:
+                    return hit
+        # last resort for glued or decorated names (`newyorkcity`, `la/long beach`)
+        compact = key.replace(" ", "")
+        for glued, city in self._by_length:
+            if glued in compact:
+                return cities[city]
+        return None
+
+    def resolve(self, location: Optional[str]) -> Optional[Coords]:
+        """Coordinates of a free-text location, or None when no known city matches."""
+        if not isinstance(location, str):
+            return None
+        self._ensure_loaded()
+        key = normalize_location(location)
+        if not key:
+            return None
+        try:
+            return self._memo[key]
+        except KeyError:
+            pass
+        coords = self._lookup(key)
+        with self._lock:
+            self._memo[key] = coords
+            self._dirty = True
+        return coords
+
+    def resolve_many(self, locations: Iterable[Optional[str]]) -> List[Optional[Coords]]:
+        coords = [self.resolve(loc) for loc in locations]
+        self.save()
+        return coords
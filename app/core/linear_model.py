@@ -0,0 +1,176 @@
+# app/core/linear_model.py
+"""NumPy-only scorer for an exported TF-IDF + linear model.
+
+For a `TfidfVectorizer` + `LogisticRegression` pipeline, inference is a
+token lookup, an idf-weighted l2-normalized count vector, a dot product and a
+softmax. `export_pipeline` dumps the fitted pieces to an `.npz` file and
+`LinearScorer` reproduces `predict_proba` from it, without importing
+sklearn or going through the Pipeline's input validation.
+"""
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+import hashlib
+import re
+import numpy as np
+
+FORMAT_VERSION = 1
+
+# (doc, term, weight, n_docs): a sparse tf-idf matrix in coordinate form
+Features = Tuple[np.ndarray, np.ndarray, np.ndarray, int]
+
+
+def file_sha1(path: Path) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def export_pipeline(pipe, path: Path, source: Optional[Path] = None) -> Path:
+    """Write the vectorizer vocabulary/idf and the classifier weights of `pipe` to `path` (.npz).
+
+    Only the configurations LinearScorer reproduces exactly are accepted;
+    anything else raises ValueError. `source` (the .joblib the pipeline came
+    from) is fingerprinted so a stale artifact can be detected at load.
+    """
+    steps = getattr(pipe, "steps", [])
+    if len(steps) != 2 or type(steps[0][1]).__name__ != "TfidfVectorizer" \
+            or type(steps[1][1]).__name__ != "LogisticRegression":
+        raise ValueError("only TfidfVectorizer + LogisticRegression pipelines can be exported")
+    vec, clf = steps[0][1], steps[1][1]
+    params = vec.get_params()
+    unsupported = {
+        "analyzer": "word", "binary": False, "preprocessor": None, "tokenizer": None,
+        "stop_words": None, "strip_accents": None, "use_idf": True,
+    }
+    for key, expected in unsupported.items():
+        if params[key] != expected:
+            raise ValueError(f"unsupported vectorizer setting {key}={params[key]!r}")
+    if params["norm"] not in ("l2", None):
+        raise ValueError(f"unsupported vectorizer setting norm={params['norm']!r}")
+
+    terms = np.empty(len(vec.vocabulary_), dtype=object)
+    for term, idx in vec.vocabulary_.items():
+        terms[idx] = term
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as f:
+        np.savez_compressed(
+            f,
+            format_version=np.array(FORMAT_VERSION),
+            terms=terms.astype(str),
+            idf=np.asarray(vec.idf_, dtype=np.float64),
+            coef=np.asarray(clf.coef_, dtype=np.float64),
+            intercept=np.asarray(clf.intercept_, dtype=np.float64),
+            classes=np.asarray(clf.classes_).astype(str),
+            ngram_range=np.asarray(params["ngram_range"]),
+            token_pattern=np.array(params["token_pattern"]),
+            lowercase=np.array(params["lowercase"]),
+            norm=np.array(params["norm"] or ""),
+            sublinear_tf=np.array(params["sublinear_tf"]),
+            source_sha1=np.array(file_sha1(source) if source else ""),
+        )
+    return path
+
+
+class LinearScorer:
+    def __init__(self, vocab: Dict[str, int], idf: np.ndarray, coef: np.ndarray, intercept: np.ndarray,
+                 classes: Sequence[str], ngram_range: Tuple[int, int] = (1, 1),
+                 token_pattern: str = r"(?u)\b\w\w+\b", lowercase: bool = True, norm: str = "l2",
+                 sublinear_tf: bool = False, source_sha1: str = ""):
+        self.vocab = vocab
+        self.idf = idf
+        self.coef = coef
+        self.intercept = intercept
+        self.classes = list(classes)
+        self.ngram_range = ngram_range
+        self.token_re = re.compile(token_pattern)
+        self.lowercase = lowercase
+        self.norm = norm
+        self.sublinear_tf = sublinear_tf
+        self.source_sha1 = source_sha1
+
+    @classmethod
+    def load(cls, path: Path) -> "LinearScorer":
+        with np.load(path, allow_pickle=False) as z:
+            if int(z["format_version"]) != FORMAT_VERSION:
+                raise ValueError(f"unsupported artifact format {int(z['format_version'])}")
+            terms = z["terms"].tolist()
+            return cls(
+                vocab={t: i for i, t in enumerate(terms)},
+                idf=z["idf"],
+                coef=z["coef"],
+                intercept=z["intercept"],
+                classes=z["classes"].tolist(),
+                ngram_range=tuple(int(n) for n in z["ngram_range"]),
+                token_pattern=str(z["token_pattern"]),
+                lowercase=bool(z["lowercase"]),
+                norm=str(z["norm"]),
+                sublinear_tf=bool(z["sublinear_tf"]),
+                source_sha1=str(z["source_sha1"]),
+            )
+
+    def _features(self, text: str) -> List[int]:
+        """Vocabulary ids of the word n-grams of `text` (same analyzer as TfidfVectorizer)."""
+        if self.lowercase:
+            text = text.lower()
+        tokens = self.token_re.findall(text)
+        lo, hi = self.ngram_range
+        vocab = self.vocab
+        ids = []
+        for n in range(lo, min(hi, len(tokens)) + 1):
+            if n == 1:
+                grams = tokens
+            else:
+                grams = [" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1)]
+            for g in grams:
+                idx = vocab.get(g)
+                if idx is not None:
+                    ids.append(idx)
+        return ids
+
+    def transform(self, texts: Sequence[str]) -> Features:
+        """Sparse tf-idf rows of `texts` as (doc, term, weight) triples, like TfidfVectorizer.transform."""
+        rows: List[np.ndarray] = []
+        feats: List[np.ndarray] = []
+        for r, text in enumerate(texts):
+            ids = self._features(text)
+            if ids:
+                feats.append(np.asarray(ids, dtype=np.int64))
+                rows.append(np.full(len(ids), r, dtype=np.int64))
+        n = len(texts)
+        if not feats:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, np.zeros(0, dtype=np.float64), n
+        # (doc, term) pairs with their counts, as in a CSR row
+        pairs = np.unique(np.concatenate(rows) * len(self.idf) + np.concatenate(feats), return_counts=True)
+        doc, term = np.divmod(pairs[0], len(self.idf))
+        tf = pairs[1].astype(np.float64)
+        if self.sublinear_tf:
+            tf = np.log(tf) + 1
+        w = tf * self.idf[term]
+        if self.norm == "l2":
+            w /= np.sqrt(np.bincount(doc, weights=w * w, minlength=n))[doc]
+        return doc, term, w, n
+
+    def decision_function(self, texts: Sequence[str], features: Optional[Features] = None) -> np.ndarray:
+        doc, term, w, n = features if features is not None else self.transform(texts)
+        scores = np.tile(self.intercept, (n, 1))
+        if not len(doc):
+            return scores
+        for c in range(self.coef.shape[0]):
+            scores[:, c] += np.bincount(doc, weights=w * self.coef[c, term], minlength=n)
+        return scores
+
+    def predict_proba(self, texts: Sequence[str], features: Optional[Features] = None) -> np.ndarray:
+        """Class probabilities of `texts`, or of rows already vectorized with `transform`."""
+        scores = self.decision_function(texts, features)
+        if scores.shape[1] == 1:
+            # binary LogisticRegression: one column of logits for classes_[1]
+            p = 1.0 / (1.0 + np.exp(-scores[:, 0]))
+            return np.column_stack([1 - p, p])
+        scores -= scores.max(axis=1, keepdims=True)
+        np.exp(scores, out=scores)
+        scores /= scores.sum(axis=1, keepdims=True)
+        return scores
@@ -1,59 +1,161 @@
 ﻿# Model loader (placeholder)
 
 from pathlib import Path
-import joblib
 import logging
+import threading
+import time
+import numpy as np
 from app.config import settings
-from typing import Tuple, Optional
+from typing import List, Optional, Sequence, Tuple
+from app.core.linear_model import LinearScorer, file_sha1
 from app.core.preprocess import Preprocessor
+from app.core.telemetry import stats
 
 logger = logging.getLogger(__name__)
 
 
+def model_variant(pipe) -> str:
+    """`tfidf` (vocabulario aprendido), `hashing` (HashingVectorizer, sin vocabulario) o `custom`."""
+    steps = [type(step).__name__ for _, step in getattr(pipe, "steps", [])]
+    if "HashingVectorizer" in steps:
+        return "hashing"
+    if "TfidfVectorizer" in steps:
+        return "tfidf"
+    return "custom"
+
+
 class SentimentModel:
     """Carga el pipeline de forma lazy (solo al predecir).
 
-    Si no existe o falla la carga, usa heurísticos simples.
+    Si junto al modelo hay un artefacto exportado (`model.npz`) generado a
+    partir de ese mismo `.joblib`, se usa el scorer en NumPy y no se importa
+    sklearn. Si no existe o falla la carga, usa heurísticos simples.
     """
     def __init__(self, model_path: Optional[Path] = None):
         self.model_path = Path(model_path) if model_path else settings.MODEL_PATH
+        self.linear_path = self.model_path.with_suffix(".npz")
         self.pipe = None
+        self.scorer: Optional[LinearScorer] = None
+        self.variant: Optional[str] = None
         self.pre = Preprocessor()
+        self._loaded = False
+        self._lock = threading.Lock()
 
     def _ensure_loaded(self):
-        if self.pipe is not None:
+        if self._loaded:
             return
-        if self.model_path.exists():
-            try:
-                self.pipe = joblib.load(self.model_path)
-                logger.info("Modelo cargado desde %s", self.model_path)
-            except Exception:
-                logger.exception("Fallo cargando el modelo desde %s", self.model_path)
-                self.pipe = None
-        else:
+        # una sola carga aunque lleguen varias peticiones a la vez
+        with self._lock:
+            if self._loaded:
+                return
+            t0 = time.perf_counter()
+            if not (settings.FAST_SCORER and self._load_scorer()):
+                self._load_pipeline()
+            backend = "scorer" if self.scorer is not None else ("pipeline" if self.pipe is not None else "heuristic")
+            stats.observe("model_load", time.perf_counter() - t0, {"backend": backend})
+            stats.set_gauge("model_backend", backend)
+            self._loaded = True
+
+    def _load_pipeline(self):
+        if not self.model_path.exists():
             logger.info("Archivo de modelo no encontrado en %s, usando heurísticos", self.model_path)
+            return
+        try:
+            # joblib (y con él sklearn al deserializar) solo se importa si hace falta el pipeline
+            import joblib
+            # mmap: los arrays del modelo se comparten entre workers vía la page cache
+            # (en un archivo comprimido joblib ignora mmap y carga en memoria)
+            self.pipe = joblib.load(self.model_path, mmap_mode="r" if settings.MODEL_MMAP else None)
+            self.variant = model_variant(self.pipe)
+            logger.info("Modelo %s cargado desde %s", self.variant, self.model_path)
+        except Exception:
+            logger.exception("Fallo cargando el modelo desde %s", self.model_path)
+            self.pipe = None
+
+    def _load_scorer(self) -> bool:
+        if not self.linear_path.exists():
+            return False
+        try:
+            scorer = LinearScorer.load(self.linear_path)
+        except Exception:
+            logger.exception("Fallo cargando el artefacto %s", self.linear_path)
+            return False
+        if self.model_path.exists() and scorer.source_sha1 != file_sha1(self.model_path):
+            logger.warning("Artefacto %s desactualizado respecto a %s, se usa el pipeline", self.linear_path, self.model_path)
+            return False
+        self.scorer = scorer
+        self.variant = "linear"
+        logger.info("Scorer lineal cargado desde %s", self.linear_path)
+        return True
+
+    def fingerprint(self) -> str:
+        """Id del modelo con el que se predice: hash del .joblib (el .npz se valida contra él)."""
+        self._ensure_loaded()
+        if self.pipe is None and self.scorer is None:
+            return "heuristic"
+        if self.model_path.exists():
+            return file_sha1(self.model_path)[:16]
+        # solo está el .npz: lo identifica el hash del .joblib del que salió
+        return (self.scorer.source_sha1 or file_sha1(self.linear_path))[:16]
+
+    def warmup(self):
+        """Carga el modelo y ejecuta una predicción para no pagarlo en la primera petición."""
+        self._ensure_loaded()
+        self.predict_batch(["warmup"])
+
+    def _heuristic(self, txt: str) -> Tuple[str, Optional[float]]:
+        t = txt.lower()
+        if any(w in t for w in ["bad", "terrible", "hate", "worst", "delay", "angry", "problem"]):
+            return "negative", 0.85
+        if any(w in t for w in ["good", "great", "love", "awesome", "thanks", "perfect", "happy"]):
+            return "positive", 0.85
+        return "neutral", 0.5
 
     def predict(self, text: str) -> Tuple[str, Optional[float]]:
-        txt = self.pre.clean_text(text)
+        return self.predict_batch([text])[0]
+
+    def predict_batch(self, texts: Sequence[str]) -> List[Tuple[str, Optional[float]]]:
+        """Predice una lista de textos con una única transformación TF-IDF.
+
+        La etiqueta es el argmax de `predict_proba`, así que el vectorizador
+        se aplica una sola vez por lote en vez de dos veces por texto.
+        """
+        with stats.timer("predict_clean"):
+            cleaned = self.pre.clean_many(texts)
+        if not cleaned:
+            return []
         # intentar cargar modelo si está disponible
         self._ensure_loaded()
+        stats.incr("predict_batches")
+        stats.incr("predict_texts", n=len(cleaned))
 
-        if self.pipe is None:
-            t = txt.lower()
-            if any(w in t for w in ["bad", "terrible", "hate", "worst", "delay", "angry", "problem"]):
-                return "negative", 0.85
-            if any(w in t for w in ["good", "great", "love", "awesome", "thanks", "perfect", "happy"]):
-                return "positive", 0.85
-            return "neutral", 0.5
+        if self.pipe is None and self.scorer is None:
+            return [self._heuristic(t) for t in cleaned]
 
         try:
-            preds = self.pipe.predict([txt])
-            prob = None
-            if hasattr(self.pipe, "predict_proba"):
-                proba = self.pipe.predict_proba([txt])[0]
-                idx = list(self.pipe.classes_).index(preds[0])
-                prob = float(proba[idx])
-            return str(preds[0]), prob
+            # vectorizar y puntuar por separado para medir cada etapa
+            if self.scorer is not None:
+                with stats.timer("predict_vectorize"):
+                    features = self.scorer.transform(cleaned)
+                with stats.timer("predict_score"):
+                    proba = self.scorer.predict_proba(cleaned, features)
+                classes = self.scorer.classes
+            elif not hasattr(self.pipe, "predict_proba"):
+                return [(str(p), None) for p in self.pipe.predict(cleaned)]
+            elif hasattr(self.pipe, "steps"):
+                with stats.timer("predict_vectorize"):
+                    features = self.pipe[:-1].transform(cleaned)
+                with stats.timer("predict_score"):
+                    proba = self.pipe[-1].predict_proba(features)
+                classes = self.pipe.classes_
+            else:
+                # estimador que no es un Pipeline: no se puede separar la vectorización
+                with stats.timer("predict_score"):
+                    proba = self.pipe.predict_proba(cleaned)
+                classes = self.pipe.classes_
+            idx = proba.argmax(axis=1)
+            scores = proba[np.arange(len(cleaned)), idx]
+            return [(str(classes[i]), float(p)) for i, p in zip(idx, scores)]
         except Exception:
             logger.exception("Error during prediction")
-            return "neutral", None
+            return [("neutral", None)] * len(cleaned)
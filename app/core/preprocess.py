@@ -1,7 +1,38 @@
 ﻿# Preprocessing utilities (placeholder)
 
+from functools import lru_cache
+from typing import Iterable, List, Union
 import re
 import unicodedata
+import numpy as np
+import pandas as pd
+
+# camino rápido: mismas reglas que clean_text con menos pasadas.
+# menciones y hashtags en una sola pasada: quitar "@\w+" no puede dejar un "#\w" nuevo
+# (lo que sigue a la mención no es \w), y "#(\w+)" -> "\1" equivale a borrar el "#"
+_URL = re.compile(r"http\S+|www\.\S+")
+_MENTION_HASHTAG = re.compile(r"@\w+|#(?=\w)")
+_NON_ALPHANUM = re.compile(r"[^a-zA-Z0-9\sáéíóúüñÁÉÍÓÚÜÑ]")
+# para textos ASCII, non_alphanum es una tabla de bytes (se conservan letras, dígitos y los espacios de \s)
+_KEEP = b"abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789 \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f"
+_ASCII_TABLE = bytes(i if i in _KEEP else 32 for i in range(256))
+CACHE_SIZE = 65536
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _clean(s: str) -> str:
+    s = s.lower()
+    if "http" in s or "www." in s:
+        s = _URL.sub("", s)
+    if "@" in s or "#" in s:
+        s = _MENTION_HASHTAG.sub("", s)
+    if s.isascii():
+        # NFKD no cambia un texto ASCII
+        s = s.encode("ascii").translate(_ASCII_TABLE).decode("ascii")
+    else:
+        s = _NON_ALPHANUM.sub(" ", unicodedata.normalize("NFKD", s))
+    return " ".join(s.split())
+
 
 class Preprocessor:
     url_pattern = re.compile(r"http\S+|www\.\S+")
@@ -9,7 +40,8 @@ class Preprocessor:
     hashtag_pattern = re.compile(r"#(\w+)")
     non_alphanum = re.compile(r"[^a-zA-Z0-9\sáéíóúüñÁÉÍÓÚÜÑ]")
 
-    def clean_text(self, text: str) -> str:
+    def clean_text_reference(self, text: str) -> str:
+        """Original step-by-step implementation; clean_text must return exactly the same."""
         if text is None:
             return ""
         s = str(text)
@@ -21,3 +53,27 @@ class Preprocessor:
         s = self.non_alphanum.sub(" ", s)
         s = " ".join(s.split())
         return s
+
+    def clean_text(self, text: str) -> str:
+        if text is None:
+            return ""
+        # memoizado: los retweets repiten el mismo texto muchas veces
+        return _clean(str(text))
+
+    def clean_many(self, texts: Union[pd.Series, np.ndarray, Iterable[str]]) -> Union[pd.Series, List[str]]:
+        """clean_text over many texts, cleaning each distinct value once.
+
+        A Series comes back as a Series with the same index, anything else as a list.
+        """
+        index = texts.index if isinstance(texts, pd.Series) else None
+        values = texts.to_numpy(dtype=object) if index is not None else np.asarray(list(texts), dtype=object)
+        codes, uniques = pd.factorize(values)
+        cleaned = np.array([self.clean_text(u) for u in uniques] + [""], dtype=object)
+        out = cleaned[codes]
+        missing = np.flatnonzero(codes == -1)
+        if len(missing):
+            # None/NaN: the per-item path decides ("" for None, str() otherwise)
+            out[missing] = [self.clean_text(values[i]) for i in missing]
+        if index is not None:
+            return pd.Series(out, index=index, dtype=object)
+        return out.tolist()
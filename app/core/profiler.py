@@ -0,0 +1,97 @@
+# app/core/profiler.py
+"""Sampling profiler for slow requests.
+
+A daemon thread samples the Python stack of every thread each
+`interval` seconds into a short ring buffer. When a request turns out to
+be slow, the samples taken while it ran are written as folded stacks
+(`frame;frame;frame count`), the input of flamegraph.pl and speedscope.
+Samples are not tied to the request's own thread: concurrent requests on
+the same worker show up in the same dump.
+"""
+from collections import Counter, deque
+from pathlib import Path
+from typing import Deque, List, Optional, Tuple
+import logging
+import os
+import re
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# leaf frames of threads that are parked, not working
+IDLE_LEAVES = {("selectors.py", "select"), ("threading.py", "wait"), ("queue.py", "get"), ("thread.py", "_worker")}
+MAX_STACK_DEPTH = 128
+
+
+def _fold(frame) -> Optional[str]:
+    parts: List[str] = []
+    while frame is not None and len(parts) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    if not parts:
+        return None
+    return ";".join(reversed(parts))
+
+
+def _is_idle(frame) -> bool:
+    code = frame.f_code
+    return (os.path.basename(code.co_filename), code.co_name) in IDLE_LEAVES
+
+
+class SamplingProfiler:
+    def __init__(self, out_dir: Path, interval: float = 0.005, window: float = 60.0):
+        self.out_dir = Path(out_dir)
+        self.interval = max(interval, 0.001)
+        self._samples: Deque[Tuple[float, str]] = deque(maxlen=int(window / self.interval) * 4)
+        self._dumps: List[Tuple[float, float, str]] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="profiler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            stacks = []
+            for ident, frame in sys._current_frames().items():
+                if ident == me or _is_idle(frame):
+                    continue
+                folded = _fold(frame)
+                if folded:
+                    stacks.append((now, folded))
+            with self._lock:
+                self._samples.extend(stacks)
+                due = [d for d in self._dumps if d[1] <= now]
+                self._dumps = [d for d in self._dumps if d[1] > now]
+            for start, end, label in due:
+                self._write(start, end, label)
+
+    def dump(self, start: float, end: float, label: str):
+        """Write the samples taken between `start` and `end` (perf_counter) to a .folded file."""
+        with self._lock:
+            self._dumps.append((start, end, label))
+
+    def _write(self, start: float, end: float, label: str):
+        with self._lock:
+            counts = Counter(s for t, s in self._samples if start <= t <= end)
+        if not counts:
+            return
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{re.sub(r'[^A-Za-z0-9]+', '_', label).strip('_')}.folded"
+        try:
+            self.out_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.out_dir / name, "w", encoding="utf-8") as f:
+                for stack, n in counts.most_common():
+                    f.write(f"{stack} {n}\n")
+        except OSError as e:
+            logger.warning("No se pudo escribir el perfil %s: %s", name, e)
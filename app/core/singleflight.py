@@ -0,0 +1,57 @@
+# app/core/singleflight.py
+"""Duplicate-call suppression for threads.
+
+FastAPI runs the sync endpoints in a threadpool, so after a restart or a
+cache clear many requests can miss the same entry at once. `SingleFlight`
+lets the first caller for a key run the computation while the others
+block and receive its result (or its exception) instead of repeating it.
+"""
+from typing import Any, Callable, Dict, Optional
+import threading
+from app.core.telemetry import stats
+
+
+class _Call:
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    def __init__(self, name: str = "default"):
+        self.name = name
+        self._calls: Dict[Any, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Any, fn: Callable[[], Any]) -> Any:
+        """Run `fn` once for all the concurrent callers passing the same `key`.
+
+        Only calls that overlap in time are merged: a caller arriving after
+        the computation finished runs `fn` again, so `fn` should look for a
+        stored result first. Re-entering with the same key from inside `fn`
+        deadlocks.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            stats.incr("singleflight_shared", {"group": self.name})
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+        try:
+            call.value = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.value
@@ -0,0 +1,425 @@
+# app/core/store.py
+"""Columnar snapshot of the tweet dataset.
+
+The `;`-separated CSV is only parsed once (at ingest or on the first cold
+start); after that the dataset lives as typed Parquet parts inside a
+directory and is loaded memory-mapped. Model predictions for a part are
+kept next to it, one sidecar file per part and model fingerprint.
+"""
+from contextlib import contextmanager
+from pathlib import Path
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+import numpy as np
+import pandas as pd
+from typing import IO, Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+import pyarrow.parquet as pq
+from app.config import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: the lock only covers the threads of one process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# fixed code table: sentiment_code is the position in SENTIMENT_LABELS, -1 when unknown
+SENTIMENT_LABELS = ("negative", "neutral", "positive")
+SENTIMENT_CODES = {label: code for code, label in enumerate(SENTIMENT_LABELS)}
+SENTIMENT_COLUMNS = ["airline_sentiment", "sentiment", "label"]
+CATEGORICAL_COLUMNS = ["name", "tweet_location", "airline"]
+EXPECTED_COLUMNS = ['text', 'airline_sentiment', 'sentiment', 'name', 'retweet_count', 'tweet_location', 'tweet_created']
+MANIFEST = "manifest.json"
+# flock()ed by whoever rewrites the manifest or rebuilds the snapshot
+LOCK_FILE = ".lock"
+# predictions/<model fingerprint>/<part signature>.parquet, plus the fingerprint in use
+PREDICTIONS_DIR = "predictions"
+CURRENT_MODEL = "CURRENT"
+# exported tweet ids are often rounded (e.g. `5,70301E+17`), so rows are keyed by id plus content
+KEY_COLUMNS = ['tweet_id', 'name', 'tweet_created', 'text']
+
+
+def read_csv(source: Union[Path, IO[str]], **kwargs) -> pd.DataFrame:
+    """Parse a raw `;`-separated export, skipping broken lines."""
+    return pd.read_csv(source, sep=";", on_bad_lines="skip", **kwargs)
+
+
+def _normalize_label(x: str) -> Optional[str]:
+    x = x.lower()
+    if 'pos' in x:
+        return 'positive'
+    if 'neg' in x:
+        return 'negative'
+    if 'neu' in x:
+        return 'neutral'
+    return None
+
+
+def sentiment_code(label: Optional[str]) -> Optional[int]:
+    """Code of a free-form label (`Negative`, `neg`...), or None if it matches none."""
+    if not label:
+        return None
+    norm = _normalize_label(str(label))
+    return SENTIMENT_CODES[norm] if norm else None
+
+
+def normalize_sentiment(s: pd.Series) -> np.ndarray:
+    """Map raw labels onto int8 codes of SENTIMENT_LABELS (-1 for unknown).
+
+    Only the distinct values go through Python; rows are mapped by code.
+    """
+    codes, uniques = pd.factorize(s)
+    table = np.array([SENTIMENT_CODES.get(_normalize_label(str(u)), -1) for u in uniques] + [-1], dtype=np.int8)
+    return table[codes]
+
+
+def row_keys(df: pd.DataFrame) -> np.ndarray:
+    """uint64 dedup key per row, stable across uploads."""
+    cols = [c for c in KEY_COLUMNS if c in df.columns]
+    return pd.util.hash_pandas_object(df[cols].astype(str), index=False).to_numpy()
+
+
+def concat_frames(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate normalized frames keeping the categorical columns categorical."""
+    frames = [f for f in frames if f is not None]
+    if len(frames) == 1:
+        return frames[0]
+    for c in CATEGORICAL_COLUMNS:
+        if all(c in f.columns for f in frames):
+            union = pd.api.types.union_categoricals([f[c] for f in frames]).categories
+            frames = [f.assign(**{c: f[c].cat.set_categories(union)}) for f in frames]
+    return pd.concat(frames, ignore_index=True)
+
+
+# per store directory: a thread lock (flock does not exclude threads sharing a descriptor) and the holder's depth
+_store_locks: Dict[str, threading.RLock] = {}
+_store_locks_guard = threading.Lock()
+_lock_depth = threading.local()
+
+
+def _tmp_path(path: Path) -> Path:
+    """Temp file next to `path`, unique per process and call, to be renamed over it."""
+    return path.with_name(f"{path.name}.{os.getpid()}.{uuid.uuid4().hex}.tmp")
+
+
+def normalize_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Coerce a raw export to the stored schema. Idempotent."""
+    # asegurar columnas mínimas
+    for c in EXPECTED_COLUMNS:
+        if c not in df.columns:
+            df[c] = None
+
+    if not pd.api.types.is_datetime64_any_dtype(df['tweet_created']):
+        try:
+            df['tweet_created'] = pd.to_datetime(df['tweet_created'], dayfirst=True, errors='coerce')
+        except Exception:
+            df['tweet_created'] = pd.to_datetime(df['tweet_created'], errors='coerce')
+
+    if not pd.api.types.is_integer_dtype(df['retweet_count']):
+        df['retweet_count'] = pd.to_numeric(df['retweet_count'], errors='coerce').fillna(0).astype('int64')
+
+    for c in CATEGORICAL_COLUMNS:
+        if c in df.columns and not isinstance(df[c].dtype, pd.CategoricalDtype):
+            df[c] = df[c].astype('category')
+
+    if 'row_key' not in df.columns:
+        df['row_key'] = row_keys(df)
+
+    if 'sentiment_code' not in df.columns:
+        col_sent = next((c for c in SENTIMENT_COLUMNS if c in df.columns and df[c].notna().any()), None)
+        if col_sent is None:
+            df['sentiment_code'] = np.full(len(df), -1, dtype=np.int8)
+        else:
+            df['sentiment_code'] = normalize_sentiment(df[col_sent])
+    return df
+
+
+class DatasetStore:
+    """Directory of Parquet parts holding the normalized dataset.
+
+    `manifest.json` lists the committed parts and carries a version id that
+    changes on every commit; parts not listed there are invisible to readers.
+    """
+
+    def __init__(self, path: Path | None = None):
+        self.path = Path(path) if path else settings.STORE_PATH
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.path / MANIFEST
+
+    def _manifest(self) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(self.manifest_path.read_text())
+        except (OSError, ValueError):
+            return None
+
+    def parts(self) -> List[Path]:
+        manifest = self._manifest()
+        if manifest is not None:
+            return [self.path / name for name in manifest["parts"]]
+        if not self.path.is_dir():
+            return []
+        # snapshot written before the manifest existed
+        return sorted(self.path.glob("part-*.parquet"))
+
+    def version(self) -> str:
+        """Id of the committed dataset; changes whenever an ingest commits."""
+        manifest = self._manifest()
+        if manifest is not None:
+            return manifest["version"]
+        sig = [f"{p.name}:{p.stat().st_size}:{p.stat().st_mtime_ns}" for p in self.parts()]
+        return hashlib.sha1("|".join(sig).encode()).hexdigest()[:16] if sig else ""
+
+    def exists(self) -> bool:
+        return bool(self.parts())
+
+    def mtime(self) -> float:
+        return max((p.stat().st_mtime for p in self.parts()), default=0.0)
+
+    @contextmanager
+    def lock(self) -> Iterator[None]:
+        """Exclusive lock on the store across threads and worker processes; re-entrant per thread."""
+        self.path.mkdir(parents=True, exist_ok=True)
+        key = str(self.path.resolve())
+        with _store_locks_guard:
+            rlock = _store_locks.setdefault(key, threading.RLock())
+        with rlock:
+            depth = getattr(_lock_depth, "held", None)
+            if depth is None:
+                depth = _lock_depth.held = {}
+            if depth.get(key):
+                depth[key] += 1
+                try:
+                    yield
+                finally:
+                    depth[key] -= 1
+                return
+            fd = os.open(self.path / LOCK_FILE, os.O_CREAT | os.O_RDWR)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                depth[key] = 1
+                try:
+                    yield
+                finally:
+                    depth[key] = 0
+            finally:
+                # closing the descriptor releases the flock
+                os.close(fd)
+
+    def commit(self, parts: List[Path], replace: bool = False) -> str:
+        """Publish `parts` (after the current ones, or instead of them) under a new version."""
+        # read-modify-write of the manifest: a concurrent commit must not drop our parts or theirs
+        with self.lock():
+            old = self.parts()
+            new = list(parts) if replace else old + list(parts)
+            version = uuid.uuid4().hex[:16]
+            tmp = _tmp_path(self.manifest_path)
+            tmp.write_text(json.dumps({"version": version, "parts": [p.name for p in new]}))
+            os.replace(tmp, self.manifest_path)
+            if replace:
+                self.discard([p for p in old if p not in new])
+        return version
+
+    def discard(self, parts: List[Path]):
+        """Delete part files that are not (or no longer) committed."""
+        for p in parts:
+            try:
+                p.unlink()
+            except FileNotFoundError:
+                pass
+
+    def read(self) -> pd.DataFrame | None:
+        parts = self.parts()
+        if not parts:
+            return None
+        frames = [normalize_frame(pd.read_parquet(p, memory_map=True)) for p in parts]
+        return concat_frames(frames)
+
+    def keys(self) -> np.ndarray:
+        """row_key of every stored row, read without loading the other columns."""
+        keys = []
+        for p in self.parts():
+            try:
+                keys.append(pd.read_parquet(p, columns=['row_key'])['row_key'].to_numpy())
+            except Exception:
+                keys.append(normalize_frame(pd.read_parquet(p))['row_key'].to_numpy())
+        return np.concatenate(keys) if keys else np.zeros(0, dtype=np.uint64)
+
+    def _next_part(self) -> Path:
+        # numbered after every file on disk, committed or not, so names never collide
+        on_disk = sorted(self.path.glob("part-*.parquet"))
+        n = int(on_disk[-1].stem.split("-")[1]) + 1 if on_disk else 0
+        return self.path / f"part-{n:05d}.parquet"
+
+    def _claim_part(self) -> Path:
+        """Reserve the next part name; O_EXCL makes the claim atomic across processes."""
+        while True:
+            path = self._next_part()
+            try:
+                os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return path
+            except FileExistsError:
+                # another writer took this number: the glob now sees it, try the next one
+                continue
+
+    @property
+    def predictions_path(self) -> Path:
+        return self.path / PREDICTIONS_DIR
+
+    @staticmethod
+    def _part_signature(part: Path) -> str:
+        # parts are write-once, but a number can be reused after a replace: size and mtime tell them apart
+        st = part.stat()
+        return f"{part.stem}-{st.st_size}-{st.st_mtime_ns}"
+
+    def prediction_path(self, part: Path, fingerprint: str) -> Path:
+        return self.predictions_path / fingerprint / f"{self._part_signature(part)}.parquet"
+
+    def write_predictions(self, part: Path, fingerprint: str, labels: Sequence[Optional[str]],
+                          scores: np.ndarray) -> Path:
+        """Persist `predicted_sentiment`/`predicted_score` for every row of `part`, in row order."""
+        path = self.prediction_path(part, fingerprint)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        frame = pd.DataFrame({
+            'predicted_sentiment': pd.Categorical(labels, categories=SENTIMENT_LABELS),
+            'predicted_score': np.asarray(scores, dtype=np.float32),
+        })
+        tmp = _tmp_path(path)
+        try:
+            frame.to_parquet(tmp, index=False)
+            os.replace(tmp, path)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        return path
+
+    def current_model(self) -> str:
+        """Fingerprint of the model the stored predictions come from ('' if none)."""
+        try:
+            return (self.predictions_path / CURRENT_MODEL).read_text().strip()
+        except OSError:
+            return ""
+
+    def set_current_model(self, fingerprint: str):
+        self.predictions_path.mkdir(parents=True, exist_ok=True)
+        path = self.predictions_path / CURRENT_MODEL
+        tmp = _tmp_path(path)
+        tmp.write_text(fingerprint)
+        os.replace(tmp, path)
+
+    def prediction_state(self, parts: List[Path]) -> str:
+        """Key that changes whenever the current model or the set of scored `parts` changes."""
+        fingerprint = self.current_model()
+        if not fingerprint:
+            return ""
+        scored = []
+        for p in parts:
+            try:
+                scored.append(self.prediction_path(p, fingerprint).exists())
+            except FileNotFoundError:
+                scored.append(False)
+        sig = "".join("1" if s else "0" for s in scored)
+        return f"{fingerprint}:{hashlib.sha1(sig.encode()).hexdigest()[:8]}:{sum(scored)}"
+
+    def read_predictions(self, parts: List[Path], fingerprint: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Predicted sentiment codes (-1 when not scored) and scores (NaN) aligned with the rows of `parts`."""
+        codes, scores = [], []
+        for p in parts:
+            path = self.prediction_path(p, fingerprint) if p.exists() else None
+            n = pq.read_metadata(p).num_rows if p.exists() else 0
+            if path is not None and path.exists():
+                pred = pd.read_parquet(path)
+                if len(pred) == n:
+                    codes.append(normalize_sentiment(pred['predicted_sentiment']))
+                    scores.append(pred['predicted_score'].to_numpy(dtype=np.float32))
+                    continue
+                logger.warning("Predicciones de %s con %d filas en vez de %d, se ignoran", p.name, len(pred), n)
+            codes.append(np.full(n, -1, dtype=np.int8))
+            scores.append(np.full(n, np.nan, dtype=np.float32))
+        if not codes:
+            return np.zeros(0, dtype=np.int8), np.zeros(0, dtype=np.float32)
+        return np.concatenate(codes), np.concatenate(scores)
+
+    def discard_predictions(self, fingerprint: str):
+        """Delete predictions of other models and of parts that are no longer committed."""
+        root = self.predictions_path
+        if not root.is_dir():
+            return
+        keep = {self.prediction_path(p, fingerprint).name for p in self.parts() if p.exists()}
+        for d in root.iterdir():
+            if not d.is_dir():
+                continue
+            for f in d.glob("*.parquet"):
+                if d.name != fingerprint or f.name not in keep:
+                    f.unlink(missing_ok=True)
+            if d.name != fingerprint and not any(d.iterdir()):
+                d.rmdir()
+
+    def read_parts(self, paths: List[Path]) -> pd.DataFrame | None:
+        if not paths:
+            return None
+        return concat_frames([normalize_frame(pd.read_parquet(p, memory_map=True)) for p in paths])
+
+    def write_part(self, df: pd.DataFrame) -> Path:
+        """Persist an already normalized frame as the next part; readers see it once committed."""
+        self.path.mkdir(parents=True, exist_ok=True)
+        path = self._claim_part()
+        # write then rename: a crash never leaves a truncated part-*.parquet behind
+        tmp = _tmp_path(path)
+        try:
+            df.to_parquet(tmp, index=False)
+            os.replace(tmp, path)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            path.unlink(missing_ok=True)
+            raise
+        return path
+
+    def write(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Replace the stored dataset with `df`."""
+        df = normalize_frame(df)
+        self.commit([self.write_part(df)], replace=True)
+        return df
+
+    @staticmethod
+    def dedup(df: pd.DataFrame, known: np.ndarray) -> pd.DataFrame:
+        """Rows of a normalized frame whose row_key is neither in `known` nor repeated."""
+        keys = df['row_key'].to_numpy()
+        fresh = ~np.isin(keys, known) & ~df['row_key'].duplicated().to_numpy()
+        return df[fresh].reset_index(drop=True)
+
+    def build_from_csv(self, csv_path: Path) -> pd.DataFrame:
+        """Parse the seed CSV once and persist it as a snapshot."""
+        df = read_csv(csv_path)
+        df = self.write(df)
+        logger.info("Snapshot creado en %s desde %s (%d filas)", self.path, csv_path, len(df))
+        return df
+
+    def _stale(self, csv_mtime: float) -> bool:
+        return not self.exists() or self.mtime() < csv_mtime
+
+    def ensure(self, csv_path: Path):
+        """Build the snapshot from the seed CSV if missing or older than the CSV.
+
+        Safe with several workers starting at once: one builds under the
+        store lock, the others wait and then find the snapshot up to date.
+        """
+        csv_mtime = csv_path.stat().st_mtime if csv_path.exists() else 0.0
+        if not csv_mtime or not self._stale(csv_mtime):
+            return
+        with self.lock():
+            # another worker may have built it while we waited for the lock
+            if self._stale(csv_mtime):
+                self.build_from_csv(csv_path)
+
+
+if __name__ == "__main__":
+    # usado en el build para que el primer arranque no tenga que parsear el CSV
+    logging.basicConfig(level=logging.INFO)
+    DatasetStore().build_from_csv(settings.DATA_PATH)
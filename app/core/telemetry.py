@@ -0,0 +1,219 @@
+# app/core/telemetry.py
+"""In-process latency histograms and gauges.
+
+`stats` is the process-wide registry: the timing middleware records one
+observation per request under its route template, and the hot paths
+(dataset load, model load, predict stages) record theirs with
+`stats.timer(name)`. `/internal/stats` renders it as JSON or in the
+Prometheus text format. Everything is per worker process.
+"""
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import math
+import threading
+import time
+
+# upper bounds in seconds; the last bucket is +Inf
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, math.inf)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        # few buckets: a linear scan beats bisect's call overhead
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (the max for the +Inf bucket)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(BUCKETS, self.counts):
+            seen += n
+            if seen >= rank:
+                return self.max if math.isinf(bound) else min(bound, self.max)
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum_s": round(self.sum, 6),
+            "mean_ms": round(self.sum / self.count * 1000, 3) if self.count else 0.0,
+            "p50_ms": round(self.quantile(0.5) * 1000, 3),
+            "p95_ms": round(self.quantile(0.95) * 1000, 3),
+            "p99_ms": round(self.quantile(0.99) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+            "buckets": {("+Inf" if math.isinf(b) else str(b)): n for b, n in zip(BUCKETS, self.counts)},
+        }
+
+
+class Stats:
+    def __init__(self):
+        self._hist: Dict[Tuple[str, Labels], Histogram] = {}
+        self._counters: Dict[Tuple[str, Labels], int] = {}
+        self._gauges: Dict[Tuple[str, Labels], Any] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name: str, labels: Optional[Dict[str, str]]) -> Tuple[str, Labels]:
+        return name, tuple(sorted(labels.items())) if labels else ()
+
+    def observe(self, name: str, seconds: float, labels: Optional[Dict[str, str]] = None):
+        key = self._key(name, labels)
+        with self._lock:
+            hist = self._hist.get(key)
+            if hist is None:
+                hist = self._hist[key] = Histogram()
+            hist.observe(seconds)
+
+    def incr(self, name: str, labels: Optional[Dict[str, str]] = None, n: int = 1):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + n
+
+    def set_gauge(self, name: str, value: Any, labels: Optional[Dict[str, str]] = None):
+        with self._lock:
+            self._gauges[self._key(name, labels)] = value
+
+    @contextmanager
+    def timer(self, name: str, labels: Optional[Dict[str, str]] = None) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - t0, labels)
+
+    def reset(self):
+        with self._lock:
+            self._hist.clear()
+            self._counters.clear()
+            self._gauges.clear()
+
+    @staticmethod
+    def _name(name: str, labels: Labels) -> str:
+        return name + "".join(f"[{k}={v}]" for k, v in labels)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "timers": {self._name(n, l): h.to_dict() for (n, l), h in sorted(self._hist.items())},
+                "counters": {self._name(n, l): v for (n, l), v in sorted(self._counters.items())},
+                "gauges": {self._name(n, l): v for (n, l), v in sorted(self._gauges.items())},
+            }
+
+    def prometheus(self, prefix: str = "sentiment_") -> str:
+        """Prometheus text exposition (histograms in seconds)."""
+        def fmt(labels: Labels, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+            items = labels + extra
+            if not items:
+                return ""
+            return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in items) + "}"
+
+        lines: List[str] = []
+        with self._lock:
+            typed = set()
+            for (name, labels), hist in sorted(self._hist.items()):
+                metric = prefix + _metric_name(name) + "_seconds"
+                if metric not in typed:
+                    typed.add(metric)
+                    lines.append(f"# TYPE {metric} histogram")
+                cumulative = 0
+                for bound, n in zip(BUCKETS, hist.counts):
+                    cumulative += n
+                    le = "+Inf" if math.isinf(bound) else repr(bound)
+                    lines.append(f"{metric}_bucket{fmt(labels, (('le', le),))} {cumulative}")
+                lines.append(f"{metric}_sum{fmt(labels)} {hist.sum}")
+                lines.append(f"{metric}_count{fmt(labels)} {hist.count}")
+            for (name, labels), value in sorted(self._counters.items()):
+                metric = prefix + _metric_name(name) + "_total"
+                if metric not in typed:
+                    typed.add(metric)
+                    lines.append(f"# TYPE {metric} counter")
+                lines.append(f"{metric}{fmt(labels)} {value}")
+            for (name, labels), value in sorted(self._gauges.items()):
+                if not isinstance(value, (int, float)) or isinstance(value, bool):
+                    continue
+                metric = prefix + _metric_name(name)
+                if metric not in typed:
+                    typed.add(metric)
+                    lines.append(f"# TYPE {metric} gauge")
+                lines.append(f"{metric}{fmt(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+class TimingMiddleware:
+    """ASGI middleware recording the latency of every HTTP request under its route template.
+
+    Unmatched paths share one `unmatched` route so scanners cannot blow up
+    the label set. With a profiler, requests slower than `slow_seconds`
+    get their samples dumped.
+    """
+
+    def __init__(self, app, profiler=None, slow_seconds: float = 0.0):
+        self.app = app
+        self.profiler = profiler
+        self.slow_seconds = slow_seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+
+        async def send_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            elapsed = time.perf_counter() - t0
+            route = _route_template(scope)
+            labels = {"method": scope["method"], "route": route}
+            stats.observe("http_request", elapsed, labels)
+            stats.incr("http_responses", {**labels, "status": str(status)})
+            if self.profiler is not None and elapsed >= self.slow_seconds:
+                self.profiler.dump(t0, t0 + elapsed, f"{scope['method']} {route} {elapsed * 1000:.0f}ms")
+
+
+def _route_template(scope) -> str:
+    """`/api/v1/ingest/jobs/{job_id}` for a matched request, `unmatched` otherwise.
+
+    Rebuilt from the path and its parameters (which the router leaves in
+    the shared scope) because nested routers only know their own suffix.
+    """
+    if scope.get("endpoint") is None:
+        return "unmatched"
+    params = {str(v): k for k, v in (scope.get("path_params") or {}).items()}
+    if not params:
+        return scope["path"]
+    return "/".join("{%s}" % params[seg] if seg in params else seg for seg in scope["path"].split("/"))
+
+
+def _metric_name(name: str) -> str:
+    return "".join(c if c.isalnum() else "_" for c in name)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+stats = Stats()
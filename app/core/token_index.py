@@ -0,0 +1,141 @@
+# app/core/token_index.py
+"""Inverted token index over the tweet texts.
+
+Built once per loaded dataset: a vocabulary, a sparse document-term matrix
+and per-sentiment term-frequency vectors, so keyword and topic queries are
+vector operations instead of re-tokenizing the corpus.
+"""
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from scipy import sparse
+from app.core.store import SENTIMENT_LABELS
+
+
+class TokenIndex:
+    def __init__(self, tokenizer: Callable[[str], List[str]]):
+        self.tokenizer = tokenizer
+        self.vocab: Dict[str, int] = {}
+        self.terms: List[str] = []
+        self.matrix = sparse.csr_matrix((0, 0), dtype=np.int32)
+        self.codes = np.zeros(0, dtype=np.int8)
+        # term frequencies per sentiment code (rows follow SENTIMENT_LABELS) and overall
+        self.sentiment_tf = np.zeros((len(SENTIMENT_LABELS), 0), dtype=np.int64)
+        self.total_tf = np.zeros(0, dtype=np.int64)
+        self._topic_cache: Dict[tuple, sparse.csr_matrix] = {}
+
+    @classmethod
+    def build(cls, texts: Iterable[str], codes: np.ndarray, tokenizer: Callable[[str], List[str]]) -> "TokenIndex":
+        index = cls(tokenizer)
+        index.add_documents(texts, codes)
+        return index
+
+    def extended(self, texts: Iterable[str], codes: np.ndarray) -> "TokenIndex":
+        """Copy of the index with extra documents; `self` is left untouched for concurrent readers."""
+        index = TokenIndex(self.tokenizer)
+        index.vocab = dict(self.vocab)
+        index.terms = list(self.terms)
+        index.matrix = self.matrix
+        index.codes = self.codes
+        index.sentiment_tf = self.sentiment_tf
+        index.total_tf = self.total_tf
+        index.add_documents(texts, codes)
+        return index
+
+    def with_codes(self, codes: np.ndarray) -> "TokenIndex":
+        """Same documents under other sentiment codes (e.g. model predictions); only sentiment_tf is recomputed.
+
+        The result shares its vocabulary and matrix with `self` and must not be extended.
+        """
+        index = TokenIndex(self.tokenizer)
+        index.vocab = self.vocab
+        index.terms = self.terms
+        index.matrix = self.matrix
+        index.total_tf = self.total_tf
+        # topic hits only depend on the matrix
+        index._topic_cache = self._topic_cache
+        index.codes = np.asarray(codes, dtype=np.int8)
+        index.sentiment_tf = np.zeros((len(SENTIMENT_LABELS), len(self.terms)), dtype=np.int64)
+        for code in range(len(SENTIMENT_LABELS)):
+            rows = np.flatnonzero(index.codes == code)
+            if len(rows):
+                index.sentiment_tf[code] = np.asarray(self.matrix[rows].sum(axis=0)).ravel()
+        return index
+
+    @property
+    def n_docs(self) -> int:
+        return self.matrix.shape[0]
+
+    def add_documents(self, texts: Iterable[str], codes: np.ndarray):
+        """Append documents; new terms extend the vocabulary."""
+        indptr = [0]
+        indices: List[int] = []
+        for text in texts:
+            for tok in self.tokenizer(text):
+                idx = self.vocab.get(tok)
+                if idx is None:
+                    idx = self.vocab[tok] = len(self.terms)
+                    self.terms.append(tok)
+                indices.append(idx)
+            indptr.append(len(indices))
+        n_terms = len(self.terms)
+        block = sparse.csr_matrix(
+            (np.ones(len(indices), dtype=np.int32), np.asarray(indices, dtype=np.int64), np.asarray(indptr, dtype=np.int64)),
+            shape=(len(indptr) - 1, n_terms),
+        )
+        block.sum_duplicates()
+
+        # widen the existing rows without resizing the shared matrix in place
+        old = sparse.csr_matrix((self.matrix.data, self.matrix.indices, self.matrix.indptr),
+                                shape=(self.matrix.shape[0], n_terms))
+        self.matrix = sparse.vstack([old, block], format="csr")
+        codes = np.asarray(codes, dtype=np.int8)
+        self.codes = np.concatenate([self.codes, codes])
+
+        grow = n_terms - len(self.total_tf)
+        self.total_tf = np.pad(self.total_tf, (0, grow))
+        self.sentiment_tf = np.pad(self.sentiment_tf, ((0, 0), (0, grow)))
+        # np.pad returns new arrays, so the updates below never touch a copied-from index
+        self.total_tf += np.asarray(block.sum(axis=0)).ravel()
+        for code in range(len(SENTIMENT_LABELS)):
+            rows = codes == code
+            if rows.any():
+                self.sentiment_tf[code] += np.asarray(block[rows].sum(axis=0)).ravel()
+        self._topic_cache = {}
+
+    def term_counts(self, code: Optional[int] = None, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Term frequencies overall, for one sentiment code, or over a row mask."""
+        if rows is not None:
+            return np.asarray(self.matrix[rows].sum(axis=0)).ravel()
+        if code is None:
+            return self.total_tf
+        return self.sentiment_tf[code]
+
+    def top_terms(self, counts: np.ndarray, top: int) -> List[Tuple[str, int]]:
+        k = min(top, int(np.count_nonzero(counts)))
+        if k <= 0:
+            return []
+        idx = np.argpartition(-counts, k - 1)[:k]
+        # highest count first; ties keep first-seen order like Counter.most_common
+        idx = idx[np.lexsort((idx, -counts[idx]))]
+        return [(self.terms[i], int(counts[i])) for i in idx]
+
+    def topic_hits(self, mapping: Dict[str, Sequence[str]]) -> sparse.csr_matrix:
+        """Boolean docs x topics matrix: a doc hits a topic if any of its terms contains a topic keyword."""
+        key = tuple((topic, tuple(kws)) for topic, kws in mapping.items())
+        hits = self._topic_cache.get(key)
+        if hits is None:
+            topic_terms = np.zeros((len(self.terms), len(mapping)), dtype=np.int32)
+            for j, kws in enumerate(mapping.values()):
+                for i, term in enumerate(self.terms):
+                    if any(kw in term for kw in kws):
+                        topic_terms[i, j] = 1
+            hits = (self.matrix @ sparse.csr_matrix(topic_terms)) > 0
+            self._topic_cache[key] = hits
+        return hits
+
+    def topic_counts(self, mapping: Dict[str, Sequence[str]], rows: Optional[np.ndarray] = None) -> Dict[str, int]:
+        hits = self.topic_hits(mapping)
+        if rows is not None:
+            hits = hits[rows]
+        counts = np.asarray(hits.sum(axis=0)).ravel()
+        return {topic: int(counts[j]) for j, topic in enumerate(mapping)}
@@ -2,9 +2,15 @@
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from app.api import internal
 from app.api.routes import api_router
 from app.config import settings
+from app.core.profiler import SamplingProfiler
+from app.core.telemetry import TimingMiddleware
+from app.services import registry
 import logging
+import threading
 
 
 def create_app():
@@ -17,16 +23,39 @@ def create_app():
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    profiler = None
+    if settings.PROFILE_SLOW_MS > 0:
+        profiler = SamplingProfiler(settings.PROFILE_DIR, settings.PROFILE_INTERVAL_MS / 1000)
+    # la más externa: mide también CORS y los errores no capturados
+    app.add_middleware(TimingMiddleware, profiler=profiler, slow_seconds=settings.PROFILE_SLOW_MS / 1000)
     app.include_router(api_router)
+    app.include_router(internal.router, prefix="/internal", tags=["internal"])
+    # listo para recibir tráfico cuando termina el warmup
+    app.state.ready = not settings.WARMUP_ON_STARTUP
 
     @app.get("/health")
     def health():
-        return {"status": "ok"}
+        if not app.state.ready:
+            return JSONResponse(status_code=503, content={"status": "starting", "ready": False})
+        return {"status": "ok", "ready": True}
+
+    def _warmup():
+        try:
+            registry.warmup()
+        except Exception:
+            logging.getLogger("uvicorn").exception("Warmup failed")
+        app.state.ready = True
 
     @app.on_event("startup")
     async def _startup_event():
         logger = logging.getLogger("uvicorn")
         logger.info("App startup. PROJECT_ROOT=%s, DATA_PATH=%s, MODEL_PATH=%s", settings.PROJECT_ROOT, settings.DATA_PATH, settings.MODEL_PATH)
+        if profiler is not None:
+            profiler.start()
+            logger.info("Profiler activo: peticiones de más de %.0f ms en %s", settings.PROFILE_SLOW_MS, settings.PROFILE_DIR)
+        if settings.WARMUP_ON_STARTUP:
+            # en un hilo: el servidor acepta conexiones y /health responde 503 mientras tanto
+            threading.Thread(target=_warmup, name="warmup", daemon=True).start()
 
     return app
 
@@ -10,8 +10,23 @@ class PredictResponse(BaseModel):
     label: str
     score: Optional[float]
 
-class IngestResponse(BaseModel):
+class PredictBatchRequest(BaseModel):
+    texts: List[str]
+
+class PredictBatchResponse(BaseModel):
+    predictions: List[PredictResponse]
+
+class IngestJobResponse(BaseModel):
+    job_id: str
+    status: str
+    mode: str
+    filename: Optional[str]
+    rows_read: int
     rows_loaded: int
+    rows_skipped: int
+    elapsed_sec: float
+    rows_per_sec: float
+    error: Optional[str]
 
 class MetricsSummary(BaseModel):
     total_tweets: int
@@ -1,35 +1,72 @@
 ﻿# ingest service (placeholder)
 
 # app/services/ingest_service.py
-from fastapi import UploadFile
-import pandas as pd
 from pathlib import Path
-from app.config import settings
+from typing import Any, Callable, Dict, Optional
 import io
+import logging
+import numpy as np
+from app.config import settings
+from app.core.store import DatasetStore, normalize_frame, read_csv
+
+logger = logging.getLogger(__name__)
 
 class IngestService:
-    def __init__(self, storage_path: Path | None = None):
-        self.storage = Path(storage_path) if storage_path else settings.DATA_PATH
+    def __init__(self, storage_path: Path | None = None, metrics=None, chunk_rows: int | None = None):
+        self.store = DatasetStore(storage_path)
+        # MetricsService to keep in sync with what gets written
+        self.metrics = metrics
+        self.chunk_rows = chunk_rows or settings.INGEST_CHUNK_ROWS
 
-    async def ingest_csv(self, file: UploadFile):
-        contents = await file.read()
-        s = contents.decode('utf-8', errors='replace')
-        # leer con separador ; y saltar líneas problemáticas
-        df = pd.read_csv(io.StringIO(s), sep=";", on_bad_lines='skip', engine='python')
+    def ingest_stream(self, raw: io.IOBase, mode: str = "replace",
+                      progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+        """Stream a raw `;`-separated export into the store in bounded chunks.
 
-        # normalizar columnas esperadas y parsear fechas
-        if 'tweet_created' in df.columns:
-            try:
-                df['tweet_created'] = pd.to_datetime(df['tweet_created'], dayfirst=True, errors='coerce')
-            except Exception:
-                df['tweet_created'] = pd.to_datetime(df['tweet_created'], errors='coerce')
+        `replace` overwrites the dataset; `append` adds the rows not already
+        stored, skipping duplicates. Each chunk is normalized and written as
+        its own part as soon as it is parsed, and `progress(rows_read,
+        rows_written)` is called after every chunk. The parts are committed
+        together at the end, so readers never see a half-ingested upload.
+        """
+        text = io.TextIOWrapper(raw, encoding='utf-8', errors='replace', newline='')
+        known = None
+        if mode == "append":
+            # no perder los datos semilla si todavía no hay snapshot
+            self.store.ensure(settings.DATA_PATH)
+            known = self.store.keys()
+        base_version = self.store.version()
 
-        # asegurar columnas mínimas
-        expected = ['text', 'airline_sentiment', 'sentiment', 'name', 'retweet_count', 'tweet_location', 'tweet_created']
-        for c in expected:
-            if c not in df.columns:
-                df[c] = None
+        rows_read = rows_written = 0
+        new_parts = []
+        try:
+            # leer con separador ; y saltar líneas problemáticas
+            for chunk in read_csv(text, chunksize=self.chunk_rows):
+                rows_read += len(chunk)
+                # normalizar columnas y tipos, y guardar el chunk como un part
+                chunk = normalize_frame(chunk)
+                if known is not None:
+                    chunk = self.store.dedup(chunk, known)
+                    known = np.concatenate([known, chunk['row_key'].to_numpy()])
+                if len(chunk):
+                    new_parts.append(self.store.write_part(chunk))
+                    rows_written += len(chunk)
+                logger.info("Ingest %s: %d filas leídas, %d guardadas", mode, rows_read, rows_written)
+                if progress is not None:
+                    progress(rows_read, rows_written)
+        except Exception:
+            # los parts sin commit no son visibles; borrarlos
+            self.store.discard(new_parts)
+            raise
+        finally:
+            # no cerrar el archivo subido junto con el wrapper
+            text.detach()
 
-        self.storage.parent.mkdir(parents=True, exist_ok=True)
-        df.to_csv(self.storage, index=False, sep=';')
-        return df
+        # publicar los parts nuevos de una vez: los lectores pasan a la nueva versión
+        if new_parts or mode != "append":
+            version = self.store.commit(new_parts, replace=(mode != "append"))
+        else:
+            version = base_version
+        if self.metrics is not None:
+            new = self.store.read_parts(new_parts) if mode == "append" else None
+            self.metrics.apply_ingest(new, mode, base_version=base_version, version=version)
+        return {"rows_loaded": rows_written, "rows_skipped": rows_read - rows_written, "mode": mode}
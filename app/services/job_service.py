@@ -0,0 +1,196 @@
+# app/services/job_service.py
+"""Background ingest jobs.
+
+The upload is spooled to a temp file inside the request (the disk writes
+run off the event loop) and the parsing runs in a worker pool; clients
+poll the job for progress. At most INGEST_MAX_PENDING uploads are in
+flight at once, further ones are refused with IngestBusy. Rescoring jobs
+run on the same worker, so they never see parts change under them.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+from fastapi import UploadFile
+from typing import Any, Dict, Optional
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from app.config import settings
+from app.services.ingest_service import IngestService
+from app.services.rescore_service import RescoreService
+
+logger = logging.getLogger(__name__)
+
+# finished jobs kept around for status polling
+MAX_FINISHED_JOBS = 100
+
+
+class IngestBusy(RuntimeError):
+    """Too many uploads in flight; the client should retry later."""
+
+
+class IngestJob:
+    def __init__(self, mode: str, filename: Optional[str]):
+        self.id = uuid.uuid4().hex
+        self.mode = mode
+        self.filename = filename
+        self.status = "queued"
+        self.rows_read = 0
+        self.rows_loaded = 0
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def progress(self, rows_read: int, rows_written: int):
+        self.rows_read = rows_read
+        self.rows_loaded = rows_written
+
+    def to_dict(self) -> Dict[str, Any]:
+        elapsed = 0.0
+        if self.started_at is not None:
+            elapsed = (self.finished_at or time.time()) - self.started_at
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "mode": self.mode,
+            "filename": self.filename,
+            "rows_read": self.rows_read,
+            "rows_loaded": self.rows_loaded,
+            "rows_skipped": self.rows_read - self.rows_loaded,
+            "elapsed_sec": round(elapsed, 3),
+            "rows_per_sec": round(self.rows_read / elapsed, 1) if elapsed > 0 else 0.0,
+            "error": self.error,
+        }
+
+
+class IngestJobService:
+    def __init__(self, ingest: IngestService, max_workers: int | None = None, max_pending: int | None = None,
+                 rescore: RescoreService | None = None):
+        self.ingest = ingest
+        self.rescore = rescore
+        self.max_pending = max_pending or settings.INGEST_MAX_PENDING
+        self._pending = 0
+        # one worker by default: parts are numbered per store, so ingests must not interleave
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or settings.INGEST_WORKERS, thread_name_prefix="ingest")
+        self._jobs: Dict[str, IngestJob] = {}
+        self._lock = threading.Lock()
+
+    async def submit(self, file: UploadFile, mode: str = "replace") -> IngestJob:
+        """Spool the upload to disk and queue it; returns immediately.
+
+        Raises IngestBusy when INGEST_MAX_PENDING uploads are already in flight.
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise IngestBusy(f"{self._pending} uploads in progress, try again later")
+            # the slot is taken before spooling so concurrent uploads count too
+            self._pending += 1
+        job = IngestJob(mode, file.filename)
+        try:
+            path = await self._spool(file)
+        except BaseException:
+            self._release()
+            raise
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        self.executor.submit(self._run, job, path)
+        return job
+
+    @staticmethod
+    async def _spool(file: UploadFile) -> str:
+        loop = asyncio.get_running_loop()
+        fd, path = tempfile.mkstemp(prefix="ingest-", suffix=".csv")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                while True:
+                    chunk = await file.read(1 << 20)
+                    if not chunk:
+                        break
+                    # a slow disk must not stall the other requests on this worker
+                    await loop.run_in_executor(None, out.write, chunk)
+        except BaseException:
+            os.remove(path)
+            raise
+        return path
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+
+    def submit_rescore(self, limit: bool = True) -> IngestJob:
+        """Queue a rescoring of the stored dataset, or return the one already queued.
+
+        With `limit`, it takes an INGEST_MAX_PENDING slot like an upload.
+        """
+        if self.rescore is None:
+            raise RuntimeError("rescoring is not configured")
+        with self._lock:
+            queued = next((j for j in self._jobs.values() if j.mode == "rescore" and j.status == "queued"), None)
+            if queued is not None:
+                return queued
+            if limit and self._pending >= self.max_pending:
+                raise IngestBusy(f"{self._pending} jobs in progress, try again later")
+            self._pending += 1
+            job = IngestJob("rescore", None)
+            self._jobs[job.id] = job
+            self._prune()
+        self.executor.submit(self._run_rescore, job)
+        return job
+
+    def _run_rescore(self, job: IngestJob):
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            # rows_skipped means rejected rows for an ingest: report only the rows scored,
+            # parts that already had predictions are not skipped rows
+            result = self.rescore.rescore(progress=lambda seen, scored: job.progress(scored, scored))
+            job.rows_read = job.rows_loaded = result["rows_loaded"]
+            job.status = "done"
+        except Exception as e:
+            logger.exception("Rescore job %s failed", job.id)
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+            self._release()
+
+    def _run(self, job: IngestJob, path: str):
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            with open(path, "rb") as f:
+                result = self.ingest.ingest_stream(f, job.mode, progress=job.progress)
+            job.rows_loaded = result["rows_loaded"]
+            job.status = "done"
+        except Exception as e:
+            logger.exception("Ingest job %s failed", job.id)
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+            self._release()
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        if job.status == "done" and settings.RESCORE_ON_INGEST and self.rescore is not None:
+            # queued behind any other upload, so it scores what they add as well
+            self.submit_rescore(limit=False)
+
+    def pending(self) -> int:
+        """Uploads spooling, queued or running."""
+        with self._lock:
+            return self._pending
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _prune(self):
+        finished = [j for j in self._jobs.values() if j.status in ("done", "failed")]
+        for job in sorted(finished, key=lambda j: j.created_at)[:-MAX_FINISHED_JOBS]:
+            del self._jobs[job.id]
@@ -2,194 +2,597 @@
 
 from pathlib import Path
 import logging
+import numpy as np
 import pandas as pd
 import re
-from collections import Counter
+import time
 from typing import Dict, Any, List, Optional, Tuple
 from app.config import settings
+from app.core.cache import CacheBackend, make_cache
+from app.core.geocoder import Geocoder
 from app.core.preprocess import Preprocessor
+from app.core.singleflight import SingleFlight
+from app.core.telemetry import stats
+from app.core.store import DatasetStore, SENTIMENT_CODES, SENTIMENT_LABELS, concat_frames, sentiment_code
+from app.core.token_index import TokenIndex
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_CSV = settings.DATA_PATH
 
+# what the sentiment metrics count: the dataset labels or the stored model predictions
+SOURCES = ('label', 'prediction')
+
+# pandas 3 only accepts the new spellings of these aliases
+FREQ_ALIASES = {'M': 'ME', 'Y': 'YE', 'A': 'YE', 'Q': 'QE', 'H': 'h'}
+
+# simple keyword->topic mapping used by topic_breakdown
+TOPIC_KEYWORDS = {
+    'customer service': ['service', 'support', 'representative', 'agent', 'customer'],
+    'flight issues': ['delay', 'cancel', 'flight', 'boarding', 'late'],
+    'product issue': ['broken', 'defect', 'damage', 'issue', 'problem'],
+    'price/fees': ['price', 'fee', 'expensive', 'cost']
+}
+
+class _Segments:
+    """Row positions per airline and a time-sorted row order for one snapshot.
+
+    Filters become an index lookup / a searchsorted slice instead of a
+    boolean scan over the frame.
+    """
+    def __init__(self, df: pd.DataFrame):
+        airline = df['airline'] if 'airline' in df.columns else None
+        if airline is None:
+            # airline is optional in uploads: no column means no airlines
+            codes, names = np.full(len(df), -1, dtype=np.int8), pd.Index([])
+        elif isinstance(airline.dtype, pd.CategoricalDtype):
+            codes, names = airline.cat.codes.to_numpy(), airline.cat.categories
+        else:
+            codes, names = pd.factorize(airline)
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(names) + 1), side='left')
+        # lower-cased name -> sorted row positions (names differing only in case are merged)
+        self.airline_rows: Dict[str, np.ndarray] = {}
+        self.airline_names: Dict[str, str] = {}
+        for i, name in enumerate(names):
+            rows = order[bounds[i]:bounds[i + 1]]
+            if len(rows):
+                key = str(name).strip().lower()
+                prev = self.airline_rows.get(key)
+                self.airline_rows[key] = rows if prev is None else np.union1d(prev, rows)
+                self.airline_names.setdefault(key, str(name))
+        created = df['tweet_created'].to_numpy()
+        valid = np.flatnonzero(~pd.isna(created))
+        self.time_order = valid[np.argsort(created[valid], kind='stable')]
+        self.sorted_times = pd.DatetimeIndex(created[self.time_order])
+
+    def rows(self, airline: Optional[str], start: Optional[pd.Timestamp], end: Optional[pd.Timestamp]) -> np.ndarray | None:
+        """Sorted positions of the rows matching the filters, or None when there is no filter."""
+        selected = None
+        if airline:
+            selected = self.airline_rows.get(airline.strip().lower(), np.zeros(0, dtype=np.int64))
+        if start is not None or end is not None:
+            lo = self.sorted_times.searchsorted(start, side='left') if start is not None else 0
+            hi = self.sorted_times.searchsorted(end, side='left') if end is not None else len(self.sorted_times)
+            in_range = np.sort(self.time_order[lo:hi])
+            selected = in_range if selected is None else np.intersect1d(selected, in_range, assume_unique=True)
+        return selected
+
+
+class _Snapshot:
+    """A loaded dataset plus everything derived from it.
+
+    Ingest builds a new snapshot and swaps the reference, so a request
+    always sees a frame, index and aggregates that belong together. A
+    prediction view is a snapshot too: `base` is the snapshot it was made
+    from, and its `sentiment_code` column holds the predicted codes.
+    """
+    def __init__(self, df: pd.DataFrame, version: str, parts: List[Path] | None = None):
+        self.df = df
+        # store version the frame was read at; part of every cache key
+        self.version = version
+        # committed parts the frame was read from, in row order
+        self.parts = parts or []
+        self.base: _Snapshot | None = None
+        # DatasetStore.prediction_state the view was read at
+        self.pred_key = ""
+        self.index: TokenIndex | None = None
+        # aggregates kept up to date on append instead of being recomputed
+        self.counts: np.ndarray | None = None
+        self.rollup: pd.DataFrame | None = None
+        self.segments: _Segments | None = None
+
+
 class MetricsService:
-    def __init__(self, csv_path: Path | None = None):
+    def __init__(self, csv_path: Path | None = None, store: DatasetStore | None = None, cache: CacheBackend | None = None,
+                 geocoder: Geocoder | None = None):
         self.csv_path = Path(csv_path) if csv_path else DEFAULT_CSV
-        self._df = None
-        self._cache: Dict[str, Any] = {}
+        self.store = store or DatasetStore()
+        self.cache = cache or make_cache()
+        self.geocoder = geocoder or Geocoder()
+        self._snap: _Snapshot | None = None
+        self._checked_at = 0.0
+        self._pred: _Snapshot | None = None
+        self._pred_checked_at = 0.0
+        # concurrent requests share one dataset load and one build of each derived structure
+        self._loads = SingleFlight("dataset")
+        self._builds = SingleFlight("derived")
         self.pre = Preprocessor()
 
-    def _load_df(self) -> pd.DataFrame | None:
-        if self._df is not None:
-            return self._df
+    def _snapshot(self) -> _Snapshot | None:
+        snap = self._snap
+        if snap is not None:
+            # another worker may have ingested: compare with the committed version now and then
+            now = time.monotonic()
+            if now - self._checked_at < settings.STORE_CHECK_INTERVAL:
+                return snap
+            self._checked_at = now
+            if self.store.version() == snap.version:
+                return snap
+            logger.info("Dataset version changed (%s -> %s), reloading", snap.version, self.store.version())
+        return self._loads.do("snapshot", self._load_snapshot)
+
+    def _load_snapshot(self) -> _Snapshot | None:
+        snap = self._snap
+        if snap is not None and snap.version == self.store.version():
+            # loaded by a caller that finished just before this one
+            return snap
         try:
-            if not self.csv_path.exists():
-                return None
-            # Use python engine to support on_bad_lines
-            self._df = pd.read_csv(self.csv_path, sep=";", engine="python", on_bad_lines="skip")
-            return self._df
+            # the snapshot wins unless the seed CSV was replaced after it was written
+            with stats.timer("dataset_load"):
+                self.store.ensure(self.csv_path)
+                version = self.store.version()
+                parts = self.store.parts()
+                df = self.store.read_parts(parts)
         except Exception as e:
             logger.exception("Error loading CSV: %s", e)
-            self._df = None
             return None
+        if df is None:
+            return None
+        self._snap = _Snapshot(df, version, parts)
+        self._report(self._snap)
+        return self._snap
+
+    @staticmethod
+    def _report(snap: _Snapshot):
+        stats.set_gauge("dataset_rows", len(snap.df))
+        # shallow: deep=True would walk every string of a large frame
+        stats.set_gauge("dataset_bytes", int(snap.df.memory_usage(deep=False).sum()))
+        stats.set_gauge("dataset_version", snap.version)
+
+    def _view(self, source: str = 'label') -> _Snapshot | None:
+        """The snapshot for `source`: the labelled dataset or its prediction view.
+
+        The view is re-read when the dataset changes or, checked now and then,
+        when a rescore added or replaced predictions. Rows without a
+        prediction have code -1 and only count towards totals.
+        Raises ValueError on an unknown source.
+        """
+        if source not in SOURCES:
+            raise ValueError(f"invalid source: {source!r} (expected one of {', '.join(SOURCES)})")
+        snap = self._snapshot()
+        if source == 'label' or snap is None:
+            return snap
+        view = self._pred
+        if view is not None and view.base is snap:
+            now = time.monotonic()
+            if now - self._pred_checked_at < settings.STORE_CHECK_INTERVAL:
+                return view
+            self._pred_checked_at = now
+            if self.store.prediction_state(snap.parts) == view.pred_key:
+                return view
+        return self._builds.do((id(snap), "predictions"), lambda: self._load_predictions(snap))
+
+    def _load_predictions(self, snap: _Snapshot) -> _Snapshot:
+        key = self.store.prediction_state(snap.parts)
+        view = self._pred
+        if view is not None and view.base is snap and view.pred_key == key:
+            return view
+        n = len(snap.df)
+        codes, scores = np.full(n, -1, dtype=np.int8), np.full(n, np.nan, dtype=np.float32)
+        fingerprint = self.store.current_model()
+        if fingerprint:
+            with stats.timer("predictions_load"):
+                read_codes, read_scores = self.store.read_predictions(snap.parts, fingerprint)
+            if len(read_codes) == n:
+                codes, scores = read_codes, read_scores
+            else:
+                logger.warning("Predictions cover %d rows, dataset has %d: ignored", len(read_codes), n)
+        df = snap.df.assign(sentiment_code=codes,
+                            predicted_sentiment=pd.Categorical.from_codes(codes, SENTIMENT_LABELS),
+                            predicted_score=scores)
+        view = _Snapshot(df, f"{snap.version}:pred:{key}", snap.parts)
+        view.base, view.pred_key = snap, key
+        self._pred = view
+        self._pred_checked_at = time.monotonic()
+        stats.set_gauge("predictions_scored_rows", int((codes >= 0).sum()))
+        return view
+
+    def apply_predictions(self):
+        """A rescore finished in this process: re-read the predictions on next use."""
+        self._pred = None
+
+    def warmup(self):
+        """Load the dataset and build the token index ahead of the first request."""
+        snap = self._snapshot()
+        if snap is not None:
+            self._load_index(snap)
+            self._rollup(snap)
+            self._segments(snap)
+
+    def _cached(self, snap: _Snapshot, key: str, compute):
+        return self.cache.get_or_compute(f"{snap.version}:{key}", compute)
+
+    @staticmethod
+    def _sentiment_key(sentiment: Optional[str]) -> str:
+        # `neg`, `Negative`... share an entry; unknown labels map to their own
+        return "all" if not sentiment else str(sentiment_code(sentiment))
+
+    def _load_df(self) -> pd.DataFrame | None:
+        snap = self._snapshot()
+        return snap.df if snap is not None else None
+
+    def _load_index(self, snap: _Snapshot) -> TokenIndex:
+        """Token index over the snapshot's dataset, built on first use."""
+        if snap.base is not None:
+            # same texts as the base snapshot: reuse its terms, recount per predicted code
+            return self._derived(snap, "index", lambda: self._load_index(snap.base).with_codes(
+                snap.df['sentiment_code'].to_numpy()))
+
+        def build():
+            df = snap.df
+            with stats.timer("metrics_index_build"):
+                index = TokenIndex.build(self.pre.clean_many(df['text'].astype(str)), df['sentiment_code'].to_numpy(), self._tokenize)
+            logger.info("Token index built: %d docs, %d terms", index.n_docs, len(index.terms))
+            return index
+        return self._derived(snap, "index", build)
+
+    def _derived(self, snap: _Snapshot, attr: str, build):
+        """`snap.<attr>`, built once by the first caller while concurrent ones wait."""
+        value = getattr(snap, attr)
+        if value is not None:
+            return value
+
+        def run():
+            value = getattr(snap, attr)
+            if value is None:
+                value = build()
+                # assigned whole: readers see either None or a finished structure
+                setattr(snap, attr, value)
+            return value
+        return self._builds.do((id(snap), attr), run)
 
     def clear_cache(self):
-        self._cache = {}
+        """Drop the loaded dataset, every derived structure and the cached results."""
+        self._snap = None
+        self._pred = None
+        self.cache.clear()
+
+    def apply_ingest(self, new: pd.DataFrame, mode: str = "replace",
+                     base_version: str | None = None, version: str | None = None):
+        """Bring the in-memory state in line with an ingest that just hit the store.
+
+        Appends extend the dataset and update counts, the hourly rollup and keyword
+        frequencies with the new rows only; a replace drops everything. Either
+        way readers switch to the new state in one reference swap. Cached
+        results need no invalidation: their keys carry the old version.
+        """
+        old = self._snap
+        if mode != "append" or old is None or old.version != base_version:
+            # nothing loaded, or loaded at another version: reload lazily
+            self._snap = None
+            return
+        if new is None or new.empty:
+            old.version = version
+            return
+        snap = _Snapshot(concat_frames([old.df, new]), version, self.store.parts())
+        codes = new['sentiment_code'].to_numpy()
+        if old.index is not None:
+            snap.index = old.index.extended(self.pre.clean_many(new['text'].astype(str)), codes)
+        if old.counts is not None:
+            snap.counts = old.counts + np.bincount(codes[codes >= 0], minlength=len(SENTIMENT_LABELS))
+        if old.rollup is not None:
+            merged = old.rollup.add(self._hourly_rollup(new), fill_value=0)
+            snap.rollup = merged.astype('int64').sort_index()
+        self._snap = snap
+        self._report(snap)
+
+    @staticmethod
+    def _sentiment_mask(df: pd.DataFrame, sentiment: Optional[str]) -> np.ndarray | None:
+        """Boolean row mask for `sentiment`, or None when no filter is requested."""
+        if not sentiment:
+            return None
+        code = sentiment_code(sentiment)
+        if code is None:
+            return np.zeros(len(df), dtype=bool)
+        return df['sentiment_code'].to_numpy() == code
+
+    @staticmethod
+    def _sentiment_counts(snap: _Snapshot) -> np.ndarray:
+        if snap.counts is None:
+            codes = snap.df['sentiment_code'].to_numpy()
+            snap.counts = np.bincount(codes[codes >= 0], minlength=len(SENTIMENT_LABELS))
+        return snap.counts
+
+    @staticmethod
+    def _report_counts(counts: np.ndarray) -> Dict[str, int]:
+        # keep the positive/neutral/negative order the dashboard colors rely on
+        return {label: int(counts[SENTIMENT_CODES[label]]) for label in ("positive", "neutral", "negative")}
+
+    @staticmethod
+    def _hourly_rollup(df: pd.DataFrame) -> pd.DataFrame:
+        """Counts per (hour, airline) (rows, sorted by hour) and sentiment code (columns)."""
+        keep = df['tweet_created'].notna().to_numpy() & (df['sentiment_code'].to_numpy() >= 0)
+        sub = df.loc[keep, [c for c in ('tweet_created', 'airline', 'sentiment_code') if c in df.columns]]
+        hour = sub['tweet_created'].dt.floor('h').rename('hour')
+        # airline by name, not category code: codes change when an append unions the categories
+        if 'airline' in sub.columns:
+            airline = sub['airline'].astype(object).fillna('').rename('airline')
+        else:
+            airline = pd.Series('', index=sub.index, dtype=object, name='airline')
+        rollup = sub.groupby([hour, airline, sub['sentiment_code']]).size().unstack(fill_value=0)
+        rollup = rollup.reindex(columns=range(len(SENTIMENT_LABELS)), fill_value=0)
+        return rollup.astype('int64').sort_index()
+
+    def _rollup(self, snap: _Snapshot) -> pd.DataFrame:
+        def build():
+            with stats.timer("metrics_rollup_build"):
+                return self._hourly_rollup(snap.df)
+        return self._derived(snap, "rollup", build)
 
-    def sentiment_summary(self) -> Dict[str, Any]:
+    @staticmethod
+    def _parse_time(value: Optional[str], name: str) -> Optional[pd.Timestamp]:
+        if not value:
+            return None
+        try:
+            ts = pd.Timestamp(value)
+        except (ValueError, TypeError):
+            raise ValueError(f"invalid {name}: {value!r}")
+        if ts.tzinfo is not None:
+            # tweet_created is stored naive: compare aware input in UTC
+            ts = ts.tz_convert('UTC').tz_localize(None)
+        return ts
+
+    def _segments(self, snap: _Snapshot) -> _Segments:
+        if snap.base is not None:
+            # airline and time lookups do not depend on the sentiment
+            return self._segments(snap.base)
+
+        def build():
+            with stats.timer("metrics_segments_build"):
+                return _Segments(snap.df)
+        return self._derived(snap, "segments", build)
+
+    def _filter(self, airline: Optional[str], start: Optional[str], end: Optional[str]):
+        """Parsed filters plus the cache-key suffix they map to."""
+        t0, t1 = self._parse_time(start, "start"), self._parse_time(end, "end")
+        key = f"{airline.strip().lower() if airline else ''}:{t0}:{t1}"
+        return (airline, t0, t1), key
+
+    def _rows(self, snap: _Snapshot, filters) -> np.ndarray | None:
+        airline, t0, t1 = filters
+        if not airline and t0 is None and t1 is None:
+            return None
+        return self._segments(snap).rows(airline, t0, t1)
+
+    @staticmethod
+    def _select(rows: np.ndarray | None, mask: np.ndarray | None) -> np.ndarray | None:
+        """Combine segment rows with a boolean sentiment mask into row positions (None = all rows)."""
+        if mask is None:
+            return rows
+        if rows is None:
+            return np.flatnonzero(mask)
+        return rows[mask[rows]]
+
+    def sentiment_summary(self, airline: Optional[str] = None, start: Optional[str] = None,
+                          end: Optional[str] = None, source: str = 'label') -> Dict[str, Any]:
         """Return counts and average sentiment score."""
-        df = self._load_df()
-        if df is None or df.empty:
+        filters, _ = self._filter(airline, start, end)
+        snap = self._view(source)
+        if snap is None or snap.df.empty:
             return {"total_tweets": 0, "by_sentiment": {"positive": 0, "neutral": 0, "negative": 0}, "avg_score": 0.0}
-        # normalize label column
-        col_sent = next((c for c in ["airline_sentiment", "sentiment", "label"] if c in df.columns), None)
-        if not col_sent:
-            return {"total_tweets": len(df), "by_sentiment": {"positive": 0, "neutral": 0, "negative": 0}, "avg_score": 0.0}
-        s = df[col_sent].astype(str).str.lower().map(lambda x: 'positive' if 'pos' in x else ('negative' if 'neg' in x else ('neutral' if 'neu' in x else x)))
-        counts = s.value_counts().to_dict()
-        total = int(len(s))
-        by_sent = {"positive": int(counts.get('positive', 0)), "neutral": int(counts.get('neutral', 0)), "negative": int(counts.get('negative', 0))}
-        # average score: positive=1, neutral=0, negative=-1
-        score_map = {'positive': 1, 'neutral': 0, 'negative': -1}
-        avg_score = 0.0
-        try:
-            avg_score = float(s.map(score_map).dropna().mean())
-        except Exception:
-            avg_score = 0.0
+        rows = self._rows(snap, filters)
+        if rows is None:
+            counts = self._sentiment_counts(snap)
+            total = int(len(snap.df))
+        else:
+            codes = snap.df['sentiment_code'].to_numpy()[rows]
+            counts = np.bincount(codes[codes >= 0], minlength=len(SENTIMENT_LABELS))
+            total = int(len(rows))
+        by_sent = self._report_counts(counts)
+        # average score: positive=1, neutral=0, negative=-1 (i.e. code - 1)
+        known = counts.sum()
+        avg_score = float((counts * np.arange(len(counts))).sum() / known - 1) if known else 0.0
         return {"total_tweets": total, "by_sentiment": by_sent, "avg_score": avg_score}
 
-    def sentiment_time_series(self, freq: str = 'D') -> List[Dict[str, Any]]:
-        """Return time series aggregated by `freq` (Pandas offset alias: 'D','W','M')."""
-        key = f"ts:{freq}"
-        if key in self._cache:
-            return self._cache[key]
-        df = self._load_df()
-        if df is None or df.empty:
-            return []
-        date_col = 'tweet_created' if 'tweet_created' in df.columns else None
-        if date_col is None:
+    def sentiment_time_series(self, freq: str = 'D', start: Optional[str] = None, end: Optional[str] = None,
+                              airline: Optional[str] = None, source: str = 'label') -> List[Dict[str, Any]]:
+        """Return time series aggregated by `freq` (Pandas offset alias: 'D','W','M').
+
+        Re-aggregates the hourly rollup, so the cost depends on the number of
+        buckets, not rows. `start` is inclusive and `end` exclusive; `airline`
+        matches case-insensitively. Dates filter at hour granularity here.
+        Raises ValueError on a bad freq or date.
+        """
+        freq = FREQ_ALIASES.get(freq, freq)
+        (_, t0, t1), fkey = self._filter(airline, start, end)
+        try:
+            pd.tseries.frequencies.to_offset(freq)
+        except ValueError:
+            raise ValueError(f"invalid freq: {freq!r}")
+        snap = self._view(source)
+        if snap is None or snap.df.empty:
             return []
-        tmp = df.dropna(subset=[date_col]).copy()
-        tmp[date_col] = pd.to_datetime(tmp[date_col], errors='coerce')
-        col_sent = next((c for c in ["airline_sentiment", "sentiment", "label"] if c in tmp.columns), None)
-        if col_sent is None:
+
+        def compute():
+            rollup = self._rollup(snap)
+            if airline:
+                names = rollup.index.get_level_values('airline')
+                rollup = rollup[names.str.lower() == airline.strip().lower()]
+            hours = rollup.index.get_level_values('hour')
+            lo = hours.searchsorted(t0, side='left') if t0 is not None else 0
+            hi = hours.searchsorted(t1, side='left') if t1 is not None else len(hours)
+            hourly = rollup.iloc[lo:hi].groupby(level='hour').sum()
+            if hourly.empty:
+                return []
+            grouped = hourly.resample(freq).sum()
+            values = grouped.to_numpy()
+            pos, neu, neg = (SENTIMENT_CODES[l] for l in ("positive", "neutral", "negative"))
+            return [{"period": str(idx), "positive": int(row[pos]), "neutral": int(row[neu]), "negative": int(row[neg])}
+                    for idx, row in zip(grouped.index, values)]
+        return self._cached(snap, f"ts:{freq}:{fkey}", compute)
+
+    @staticmethod
+    def _tokenize(cleaned: str) -> List[str]:
+        """Tokens of an already cleaned text (the index is fed clean_many output)."""
+        return [w for w in cleaned.split() if len(w) > 2]
+
+    def top_keywords(self, sentiment: Optional[str] = None, top: int = 50, airline: Optional[str] = None,
+                     start: Optional[str] = None, end: Optional[str] = None,
+                     source: str = 'label') -> List[Tuple[str, int]]:
+        filters, fkey = self._filter(airline, start, end)
+        snap = self._view(source)
+        if snap is None or snap.df.empty:
             return []
-        tmp['sent_norm'] = tmp[col_sent].astype(str).str.lower().map(lambda x: 'positive' if 'pos' in x else ('negative' if 'neg' in x else ('neutral' if 'neu' in x else x)))
-        tmp = tmp.dropna(subset=['sent_norm'])
-        tmp = tmp.set_index(date_col)
-        grouped = tmp.groupby([pd.Grouper(freq=freq), 'sent_norm']).size().unstack(fill_value=0)
-        result = []
-        for idx, row in grouped.iterrows():
-            result.append({"period": str(idx), "positive": int(row.get('positive', 0)), "neutral": int(row.get('neutral', 0)), "negative": int(row.get('negative', 0))})
-        self._cache[key] = result
-        return result
-
-    def _tokenize(self, text: str) -> List[str]:
-        s = self.pre.clean_text(text)
-        tokens = [w for w in s.split() if len(w) > 2]
-        return tokens
-
-    def top_keywords(self, sentiment: Optional[str] = None, top: int = 50) -> List[Tuple[str, int]]:
-        key = f"kw:{sentiment}:{top}"
-        if key in self._cache:
-            return self._cache[key]
-        df = self._load_df()
-        if df is None or df.empty:
+        code = sentiment_code(sentiment)
+        if sentiment and code is None:
             return []
-        col_sent = next((c for c in ["airline_sentiment", "sentiment", "label"] if c in df.columns), None)
-        texts = df['text'].astype(str)
-        if sentiment and col_sent:
-            mask = df[col_sent].astype(str).str.lower().str.contains(sentiment.lower())
-            texts = df.loc[mask, 'text'].astype(str)
-        counter = Counter()
-        for t in texts:
-            toks = self._tokenize(t)
-            counter.update(toks)
-        common = counter.most_common(top)
-        self._cache[key] = common
-        return common
-
-    def topic_breakdown(self, sentiment: str = 'negative') -> Dict[str, int]:
+
+        def compute():
+            index = self._load_index(snap)
+            rows = self._rows(snap, filters)
+            if rows is None:
+                return index.top_terms(index.term_counts(code=code), top)
+            if code is not None:
+                rows = rows[index.codes[rows] == code]
+            return index.top_terms(index.term_counts(rows=rows), top)
+        return self._cached(snap, f"kw:{code}:{top}:{fkey}", compute)
+
+    def topic_breakdown(self, sentiment: str = 'negative', airline: Optional[str] = None,
+                        start: Optional[str] = None, end: Optional[str] = None,
+                        source: str = 'label') -> Dict[str, int]:
         """Simple rule-based topic mapping for negative mentions."""
-        # define simple keyword->topic mapping
-        mapping = {
-            'customer service': ['service', 'support', 'representative', 'agent', 'customer'],
-            'flight issues': ['delay', 'cancel', 'flight', 'boarding', 'late'],
-            'product issue': ['broken', 'defect', 'damage', 'issue', 'problem'],
-            'price/fees': ['price', 'fee', 'expensive', 'cost']
-        }
-        df = self._load_df()
-        if df is None or df.empty:
+        filters, fkey = self._filter(airline, start, end)
+        snap = self._view(source)
+        if snap is None or snap.df.empty:
             return {}
-        col_sent = next((c for c in ["airline_sentiment", "sentiment", "label"] if c in df.columns), None)
-        if not col_sent:
-            return {}
-        s = df[df[col_sent].astype(str).str.lower().str.contains(sentiment.lower(), na=False)]
-        counts = {k: 0 for k in mapping.keys()}
-        for text in s['text'].astype(str):
-            t = text.lower()
-            for topic, kws in mapping.items():
-                for kw in kws:
-                    if kw in t:
-                        counts[topic] += 1
-                        break
-        return counts
-
-    def top_influencers(self, sentiment: Optional[str] = None, limit: int = 20, sort_by: str = 'count') -> List[Dict[str, Any]]:
-        df = self._load_df()
-        if df is None or df.empty:
+
+        def compute():
+            rows = self._select(self._rows(snap, filters), self._sentiment_mask(snap.df, sentiment))
+            return self._load_index(snap).topic_counts(TOPIC_KEYWORDS, rows=rows)
+        return self._cached(snap, f"topics:{self._sentiment_key(sentiment)}:{fkey}", compute)
+
+    def top_influencers(self, sentiment: Optional[str] = None, limit: int = 20, sort_by: str = 'count',
+                        airline: Optional[str] = None, start: Optional[str] = None,
+                        end: Optional[str] = None, source: str = 'label') -> List[Dict[str, Any]]:
+        filters, fkey = self._filter(airline, start, end)
+        snap = self._view(source)
+        if snap is None or snap.df.empty:
             return []
-        col_sent = next((c for c in ["airline_sentiment", "sentiment", "label"] if c in df.columns), None)
-        tmp = df.copy()
-        if sentiment and col_sent:
-            tmp = tmp[tmp[col_sent].astype(str).str.lower().str.contains(sentiment.lower(), na=False)]
-        g = tmp.groupby('name').agg(count=('text', 'count'), retweets=('retweet_count', lambda s: pd.to_numeric(s, errors='coerce').fillna(0).sum()))
-        g = g.reset_index()
-        if sort_by == 'retweets':
-            g = g.sort_values('retweets', ascending=False)
-        else:
-            g = g.sort_values('count', ascending=False)
-        res = g.head(limit).to_dict(orient='records')
-        return res
 
-    def geo_distribution(self, top: int = 100) -> List[Dict[str, Any]]:
-        df = self._load_df()
-        if df is None or df.empty:
+        def compute():
+            df = snap.df
+            rows = self._select(self._rows(snap, filters), self._sentiment_mask(df, sentiment))
+            tmp = df if rows is None else df.iloc[rows]
+            g = tmp.groupby('name', observed=True).agg(count=('text', 'count'), retweets=('retweet_count', lambda s: pd.to_numeric(s, errors='coerce').fillna(0).sum()))
+            g = g.reset_index()
+            if sort_by == 'retweets':
+                g = g.sort_values('retweets', ascending=False)
+            else:
+                g = g.sort_values('count', ascending=False)
+            return g.head(limit).to_dict(orient='records')
+        return self._cached(snap, f"influencers:{self._sentiment_key(sentiment)}:{limit}:{sort_by}:{fkey}", compute)
+
+    def geo_distribution(self, top: int = 100, airline: Optional[str] = None, start: Optional[str] = None,
+                         end: Optional[str] = None, source: str = 'label') -> List[Dict[str, Any]]:
+        filters, fkey = self._filter(airline, start, end)
+        snap = self._view(source)
+        if snap is None or snap.df.empty:
             return []
+        df = snap.df
         if 'tweet_location' not in df.columns:
             return []
-        locs = df['tweet_location'].astype(str).replace({'nan': None}).dropna()
-        counts = locs.value_counts().head(top).to_dict()
-        return [{"location": k, "count": int(v)} for k, v in counts.items()]
 
-    def summary(self) -> Dict[str, Any]:
-        df = self._load_df()
-        if df is None or df.empty:
+        def compute():
+            rows = self._rows(snap, filters)
+            locs = df['tweet_location'] if rows is None else df['tweet_location'].iloc[rows]
+            locs = locs.astype(str).replace({'nan': None}).dropna()
+            counts = locs.value_counts().head(top).to_dict()
+            # only the top locations are geocoded, each one once thanks to the geocoder memo
+            coords = self.geocoder.resolve_many(counts)
+            return [{"location": k, "count": int(v), "lat": c[0] if c else None, "lon": c[1] if c else None}
+                    for (k, v), c in zip(counts.items(), coords)]
+        return self._cached(snap, f"geo:{top}:{fkey}", compute)
+
+    def airline_counts(self, start: Optional[str] = None, end: Optional[str] = None,
+                       top: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Tweets per airline (most mentioned first), optionally within a date range."""
+        filters, fkey = self._filter(None, start, end)
+        snap = self._snapshot()
+        if snap is None or snap.df.empty:
+            return []
+
+        def compute():
+            seg = self._segments(snap)
+            rows = self._rows(snap, filters)
+            counts = []
+            for key, positions in seg.airline_rows.items():
+                n = len(positions) if rows is None else len(np.intersect1d(positions, rows, assume_unique=True))
+                if n:
+                    counts.append({"airline": seg.airline_names[key], "count": int(n)})
+            counts.sort(key=lambda r: r["count"], reverse=True)
+            return counts
+        result = self._cached(snap, f"airlines:{fkey}", compute)
+        return result[:top] if top else result
+
+    def date_range(self) -> Dict[str, Optional[str]]:
+        """First and last tweet_created of the dataset (None when there are no dates)."""
+        snap = self._snapshot()
+        if snap is None or snap.df.empty:
+            return {"start": None, "end": None}
+        times = self._segments(snap).sorted_times
+        if not len(times):
+            return {"start": None, "end": None}
+        return {"start": times[0].isoformat(), "end": times[-1].isoformat()}
+
+    def dataset_version(self, source: str = 'label') -> str:
+        """Version of the loaded dataset ("" when there is none); changes on every ingest.
+
+        For predictions it also changes when a rescore stores new ones.
+        """
+        snap = self._view(source)
+        return snap.version if snap is not None else ""
+
+    def dashboard(self, freq: str = 'D', keywords_sentiment: Optional[str] = None, keywords_top: int = 50,
+                  topics_sentiment: str = 'negative', influencers_limit: int = 20, influencers_sort: str = 'count',
+                  geo_top: int = 100, airline: Optional[str] = None, start: Optional[str] = None,
+                  end: Optional[str] = None, source: str = 'label') -> Dict[str, Any]:
+        """Every dashboard view for one segment in a single response.
+
+        The sections share the snapshot's segment lookups and cached results;
+        `version` identifies the data the response was built from.
+        """
+        _, fkey = self._filter(airline, start, end)
+        snap = self._view(source)
+        seg = {"airline": airline, "start": start, "end": end, "source": source}
+
+        def compute():
             return {
-                "total_tweets": 0,
-                "by_sentiment": {"positive": 0, "neutral": 0, "negative": 0},
-                "top_airlines": []
+                "version": snap.version if snap is not None else "",
+                "summary": self.sentiment_summary(**seg),
+                "time_series": self.sentiment_time_series(freq, **seg),
+                "keywords": self.top_keywords(keywords_sentiment, keywords_top, **seg),
+                "topics": self.topic_breakdown(topics_sentiment, **seg),
+                "influencers": self.top_influencers(None, influencers_limit, influencers_sort, **seg),
+                "geo": self.geo_distribution(geo_top, **seg),
             }
-        col_sent = None
-        for c in ["airline_sentiment","sentiment","label"]:
-            if c in df.columns:
-                col_sent = c
-                break
-        col_airline = "airline" if "airline" in df.columns else None
-        total = len(df)
-        if col_sent:
-            counts = df[col_sent].astype(str).str.lower().value_counts().to_dict()
-            by_sentiment = {
-                "positive": int(counts.get("positive", 0)),
-                "neutral": int(counts.get("neutral", 0)),
-                "negative": int(counts.get("negative", 0))
-            }
-        else:
-            by_sentiment = {"positive": 0, "neutral": 0, "negative": 0}
-        if col_airline:
-            top = df[col_airline].value_counts().head(10).to_dict()
-            top_list = [{"airline": k, "count": int(v)} for k,v in top.items()]
-        else:
-            top_list = []
-        return {"total_tweets": int(total), "by_sentiment": by_sentiment, "top_airlines": top_list}
+        if snap is None:
+            return compute()
+        key = (f"dash:{freq}:{self._sentiment_key(keywords_sentiment)}:{keywords_top}:"
+               f"{self._sentiment_key(topics_sentiment)}:{influencers_limit}:{influencers_sort}:{geo_top}:{fkey}")
+        return self._cached(snap, key, compute)
+
+    def summary(self, start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, Any]:
+        base = self.sentiment_summary(start=start, end=end)
+        return {"total_tweets": base["total_tweets"], "by_sentiment": base["by_sentiment"],
+                "top_airlines": self.airline_counts(start, end, top=10)}
@@ -0,0 +1,29 @@
+# app/services/registry.py
+"""Process-wide service instances shared by the routers.
+
+Ingest has to reach the same MetricsService the metric endpoints read from,
+so the instances live here instead of in each router module.
+"""
+import logging
+import time
+from app.services.metrics_service import MetricsService
+from app.services.ingest_service import IngestService
+from app.services.sentiment_service import SentimentService
+from app.services.job_service import IngestJobService
+from app.services.rescore_service import RescoreService
+
+metrics_service = MetricsService()
+ingest_service = IngestService(metrics=metrics_service)
+rescore_service = RescoreService(ingest_service.store, metrics=metrics_service)
+ingest_jobs = IngestJobService(ingest_service, rescore=rescore_service)
+sentiment_service = SentimentService()
+
+
+def warmup():
+    """Load the model and the dataset eagerly (called from the app startup)."""
+    logger = logging.getLogger(__name__)
+    t0 = time.perf_counter()
+    sentiment_service.warmup()
+    t1 = time.perf_counter()
+    metrics_service.warmup()
+    logger.info("Warmup listo: modelo %.2fs, dataset %.2fs", t1 - t0, time.perf_counter() - t1)
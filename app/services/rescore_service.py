@@ -0,0 +1,122 @@
+# app/services/rescore_service.py
+"""Score the stored dataset with the current model.
+
+Every committed part without predictions for the current model
+fingerprint is read in batches and scored in a process pool; the results
+are written as a sidecar next to the part (see DatasetStore). Parts that
+already have predictions for this model are skipped, so after an append
+only the new parts are scored, and a new model rescores everything.
+"""
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+import logging
+import multiprocessing
+import numpy as np
+import pyarrow.parquet as pq
+from app.config import settings
+from app.core.model import SentimentModel
+from app.core.store import DatasetStore
+
+logger = logging.getLogger(__name__)
+
+# model loaded once per pool process
+_worker_model: Optional[SentimentModel] = None
+
+
+def _init_worker(model_path: str):
+    global _worker_model
+    _worker_model = SentimentModel(Path(model_path))
+
+
+def _score_texts(texts: List[str]) -> Tuple[List[str], np.ndarray]:
+    preds = _worker_model.predict_batch(texts)
+    labels = [label for label, _ in preds]
+    scores = np.array([np.nan if score is None else score for _, score in preds], dtype=np.float32)
+    return labels, scores
+
+
+class _InlineExecutor(Executor):
+    """Runs the tasks in the calling thread (RESCORE_WORKERS=0)."""
+
+    def submit(self, fn, *args, **kwargs):
+        fut = Future()
+        try:
+            fut.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            fut.set_exception(e)
+        return fut
+
+
+class RescoreService:
+    def __init__(self, store: DatasetStore | None = None, model_path: Path | None = None, metrics=None,
+                 workers: int | None = None, batch_rows: int | None = None):
+        self.store = store or DatasetStore()
+        self.model_path = Path(model_path) if model_path else settings.MODEL_PATH
+        # MetricsService that serves the predictions
+        self.metrics = metrics
+        self.workers = settings.RESCORE_WORKERS if workers is None else workers
+        self.batch_rows = batch_rows or settings.RESCORE_BATCH_ROWS
+
+    def _executor(self) -> Executor:
+        if self.workers <= 0:
+            _init_worker(str(self.model_path))
+            return _InlineExecutor()
+        # spawn: forking a process that runs uvicorn's threads is not safe
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=_init_worker, initargs=(str(self.model_path),))
+
+    def rescore(self, progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+        """Score the parts that have no predictions for the current model.
+
+        `progress(rows_seen, rows_scored)` is called after every part.
+        """
+        fingerprint = SentimentModel(self.model_path).fingerprint()
+        parts = self.store.parts()
+        todo = [p for p in parts if not self.store.prediction_path(p, fingerprint).exists()]
+        rows_seen = rows_scored = 0
+        for p in parts:
+            if p not in todo:
+                rows_seen += pq.read_metadata(p).num_rows
+        logger.info("Rescoring con el modelo %s: %d de %d parts pendientes", fingerprint, len(todo), len(parts))
+
+        if todo:
+            with self._executor() as pool:
+                for part in todo:
+                    labels, scores = self._score_part(pool, part)
+                    self.store.write_predictions(part, fingerprint, labels, scores)
+                    rows_seen += len(labels)
+                    rows_scored += len(labels)
+                    logger.info("Rescoring: %s (%d filas)", part.name, len(labels))
+                    if progress is not None:
+                        progress(rows_seen, rows_scored)
+        # publicar el modelo en uso y limpiar predicciones de otros modelos o de parts ya borrados
+        self.store.set_current_model(fingerprint)
+        self.store.discard_predictions(fingerprint)
+        if self.metrics is not None:
+            self.metrics.apply_predictions()
+        return {"model": fingerprint, "parts_scored": len(todo), "parts_skipped": len(parts) - len(todo),
+                "rows_loaded": rows_scored, "rows_read": rows_seen}
+
+    def _score_part(self, pool: Executor, part: Path) -> Tuple[List[str], np.ndarray]:
+        """Stream the part's texts in batches to the pool, keeping a bounded number in flight."""
+        pending: Deque[Future] = deque()
+        labels: List[str] = []
+        scores: List[np.ndarray] = []
+
+        def collect():
+            batch_labels, batch_scores = pending.popleft().result()
+            labels.extend(batch_labels)
+            scores.append(batch_scores)
+
+        reader = pq.ParquetFile(part)
+        for batch in reader.iter_batches(batch_size=self.batch_rows, columns=['text']):
+            # same text the metrics see: missing values become "nan"
+            texts = batch.column(0).to_pandas().astype(str).tolist()
+            pending.append(pool.submit(_score_texts, texts))
+            if len(pending) >= max(self.workers, 1) * 2:
+                collect()
+        while pending:
+            collect()
+        return labels, np.concatenate(scores) if scores else np.zeros(0, dtype=np.float32)
@@ -1,11 +1,25 @@
 ﻿# Sentiment service (placeholder)
 
+from app.config import settings
+from app.core.batcher import MicroBatcher
 from app.core.model import SentimentModel
 
 class SentimentService:
     def __init__(self, model_path=None):
         self.model = SentimentModel(model_path)
+        self.batcher = MicroBatcher(self.model.predict_batch, settings.PREDICT_BATCH_WINDOW_MS, settings.PREDICT_MAX_BATCH)
 
     def predict(self, text: str):
         label, score = self.model.predict(text)
         return label, score
+
+    async def predict_async(self, text: str):
+        """Like predict, but coalesced with concurrent requests into one model call."""
+        label, score = await self.batcher.submit(text)
+        return label, score
+
+    def warmup(self):
+        self.model.warmup()
+
+    def predict_batch(self, texts):
+        return self.model.predict_batch(texts)
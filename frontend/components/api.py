@@ -1,30 +1,75 @@
 """
 Módulo para manejar llamadas a la API del backend
 """
+import os
 import requests
 import streamlit as st
+from requests.adapters import HTTPAdapter
 from typing import Optional, Dict, Any
+from urllib3.util.retry import Retry
 
 API_URL = "https://sentiment-project-0qyx.onrender.com/api/v1"  
 HEALTH_URL = "https://sentiment-project-0qyx.onrender.com/health"
+# segundos que se reutiliza una respuesta GET idéntica antes de volver a pedirla
+CACHE_TTL = int(os.getenv("API_CACHE_TTL", "60"))
 
+
+class ApiError(Exception):
+    def __init__(self, status_code: int, text: str):
+        super().__init__(f"Error {status_code}: {text}")
+        self.status_code = status_code
+        self.text = text
+
+
+@st.cache_resource
+def get_session() -> requests.Session:
+    """Sesión compartida: conexiones keep-alive reutilizadas (sin handshake TLS por llamada).
+
+    Reintenta errores de conexión y 502/504 con backoff. Solo se reintentan
+    los GET; un 503 no se reintenta porque es la respuesta de /health
+    mientras el backend arranca.
+    """
+    retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(502, 504),
+                  allowed_methods=frozenset({"GET", "HEAD"}), raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+@st.cache_data(ttl=30, show_spinner=False)
 def check_backend_health() -> bool:
     try:
-        response = requests.get(HEALTH_URL, timeout=5)
+        response = get_session().get(HEALTH_URL, timeout=5)
         return response.status_code == 200
-    except:
+    except Exception:
         return False
 
 
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _get_json(endpoint: str, params: Dict[str, Any]) -> Dict:
+    # los errores se lanzan (no se devuelven) para que st.cache_data no los guarde
+    response = get_session().get(f"{API_URL}{endpoint}", params=params, timeout=10)
+    if response.status_code != 200:
+        raise ApiError(response.status_code, response.text)
+    return response.json()
+
+
+def invalidate_cache():
+    """Olvida las respuestas cacheadas; llamar cuando cambian los datos (import o recompute)."""
+    _get_json.clear()
+    check_backend_health.clear()
+
+
 def api_call(endpoint: str, params: Optional[Dict[str, Any]] = None) -> Optional[Dict]:
     try:
-        url = f"{API_URL}{endpoint}"
-        response = requests.get(url, params=params, timeout=10)
-        if response.status_code == 200:
-            return response.json()
-        else:
-            st.error(f"Error {response.status_code}: {response.text}")
-            return None
+        # sin los None, para que la misma consulta comparta entrada de caché
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+        return _get_json(endpoint, params)
+    except ApiError as e:
+        st.error(str(e))
+        return None
     except requests.exceptions.ConnectionError:
         st.error("❌ No se puede conectar al backend. Asegúrate de que FastAPI está corriendo en http://127.0.0.1:8000")
         return None
@@ -33,9 +78,35 @@ def api_call(endpoint: str, params: Optional[Dict[str, Any]] = None) -> Optional
         return None
 
 
+def get_dashboard(params: Optional[Dict[str, Any]] = None) -> Optional[Dict]:
+    """Todas las vistas en una sola llamada, revalidada con ETag.
+
+    La última respuesta se guarda en session_state; si los datos no han
+    cambiado el backend contesta 304 sin cuerpo y se reutiliza.
+    """
+    params = {k: v for k, v in (params or {}).items() if v is not None}
+    key = "dashboard:" + repr(sorted(params.items()))
+    cached = st.session_state.get(key)
+    headers = {"If-None-Match": cached["etag"]} if cached else {}
+    try:
+        response = get_session().get(f"{API_URL}/metrics/dashboard", params=params, headers=headers, timeout=10)
+        if response.status_code == 304 and cached:
+            return cached["data"]
+        if response.status_code == 200:
+            data = response.json()
+            st.session_state[key] = {"etag": response.headers.get("ETag"), "data": data}
+            return data
+        st.error(f"Error {response.status_code}: {response.text}")
+    except requests.exceptions.ConnectionError:
+        st.error("❌ No se puede conectar al backend. Asegúrate de que FastAPI está corriendo en http://127.0.0.1:8000")
+    except Exception as e:
+        st.error(f"❌ Error en la solicitud: {str(e)}")
+    return cached["data"] if cached else None
+
+
 def predict_sentiment(text: str) -> Optional[Dict]:
     try:
-        response = requests.post(f"{API_URL}/predict/predict", 
+        response = get_session().post(f"{API_URL}/predict/predict", 
                                 json={"text": text}, 
                                 timeout=10)
         if response.status_code == 200:
@@ -47,18 +118,33 @@ def predict_sentiment(text: str) -> Optional[Dict]:
 
 def recompute_cache() -> bool:
     try:
-        requests.post(f"{API_URL}/metrics/recompute", timeout=10)
-        return True
-    except:
+        response = get_session().post(f"{API_URL}/metrics/recompute", timeout=10)
+        return response.status_code == 200
+    except Exception:
         return False
 
 
-def ingest_csv(file) -> Optional[Dict]:
+def ingest_csv(file, mode: str = "replace") -> Optional[Dict]:
+    """Sube el CSV; el backend responde con un job que se procesa en segundo plano."""
     try:
         files = {"file": file}
-        response = requests.post(f"{API_URL}/ingest/ingest_csv", files=files, timeout=30)
-        if response.status_code == 200:
+        response = get_session().post(f"{API_URL}/ingest/ingest_csv", files=files, params={"mode": mode}, timeout=30)
+        if response.status_code in (200, 202):
             return response.json()
+        if response.status_code == 429:
+            st.warning("El servidor está procesando otras importaciones; vuelve a intentarlo en unos segundos.")
+            return None
+        st.error(f"Error {response.status_code}: {response.text}")
     except Exception as e:
         st.error(f"Error al subir: {str(e)}")
     return None
+
+
+def get_ingest_job(job_id: str) -> Optional[Dict]:
+    try:
+        response = get_session().get(f"{API_URL}/ingest/jobs/{job_id}", timeout=10)
+        if response.status_code == 200:
+            return response.json()
+    except Exception:
+        pass
+    return None
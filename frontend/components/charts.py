@@ -1,7 +1,7 @@
 import plotly.graph_objects as go
 import plotly.express as px
 import pandas as pd
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Tuple
 
 def create_sentiment_pie(sentiments: Dict[str, int]) -> go.Figure:
     """Crea gráfico de dona de sentimiento"""
@@ -111,43 +111,16 @@ def create_geo_chart(df: pd.DataFrame, max_items: int = 20) -> go.Figure:
     )
     return fig
 
-try:
-    US_CITIES = pd.read_csv("app/data/usa_cities.csv")
-    US_CITIES["city"] = US_CITIES["city"].astype(str).str.strip().str.lower()
-except Exception:
-    US_CITIES = pd.DataFrame(columns=["city","state","lat","lon"])
-
-def get_city_coords(city: str) -> Optional[tuple]:
-    if not isinstance(city, str):
-        return None
-    key = city.strip().lower()
-
-    row = US_CITIES[US_CITIES["city"] == key]
-    if not row.empty:
-        return float(row.iloc[0]["lat"]), float(row.iloc[0]["lon"])
-    for candidate in US_CITIES["city"].unique():
-        if candidate in key:
-            r = US_CITIES[US_CITIES["city"] == candidate]
-            return float(r.iloc[0]["lat"]), float(r.iloc[0]["lon"])
-    return None
-
 def create_geo_map(df: pd.DataFrame, location_col: str = "Ubicación", count_col: str = "Menciones"):
-  
-    if df is None or df.empty:
+    """Mapa de burbujas con las coordenadas (lat, lon) que ya resuelve el backend en /metrics/geo."""
+    if df is None or df.empty or not {"lat", "lon"} <= set(df.columns):
         return None
 
-    work = df.copy()
-    work[location_col] = work[location_col].astype(str).str.strip().str.lower()
-
-    work["coords"] = work[location_col].apply(get_city_coords)
-    work = work.dropna(subset=["coords"])
+    work = df.dropna(subset=["lat", "lon"])
 
     if work.empty:
         return None
 
-    work["lat"] = work["coords"].apply(lambda x: x[0])
-    work["lon"] = work["coords"].apply(lambda x: x[1])
-
     fig = px.scatter_geo(
         work,
         lat="lat",
@@ -1,8 +1,10 @@
 """
 Componentes de UI reutilizables
 """
+import time
+from datetime import date, timedelta
 import streamlit as st
-from components.api import recompute_cache, ingest_csv, predict_sentiment
+from components.api import api_call, invalidate_cache, recompute_cache, ingest_csv, get_ingest_job, predict_sentiment
 
 
 def render_sidebar():
@@ -13,6 +15,7 @@ def render_sidebar():
         # Botón para recargar datos
         if st.button("🔄 Recargar datos (limpiar caché)", use_container_width=True):
             if recompute_cache():
+                invalidate_cache()
                 st.success("✅ Caché limpiado")
                 st.rerun()
             else:
@@ -23,13 +26,29 @@ def render_sidebar():
         # Sección de importar datos
         st.subheader("📁 Importar datos")
         uploaded_file = st.file_uploader("Selecciona un CSV", type=["csv"])
-        if uploaded_file is not None:
+        append = st.checkbox("Añadir a los datos existentes", value=False,
+                             help="Agrega solo las filas nuevas en lugar de reemplazar el dataset")
+        # el archivo sigue seleccionado tras st.rerun: no volver a importarlo
+        if uploaded_file is not None and st.session_state.get("ingested_file") != uploaded_file.file_id:
+            st.session_state["ingested_file"] = uploaded_file.file_id
             with st.spinner("Subiendo archivo..."):
-                result = ingest_csv(uploaded_file)
-                if result:
-                    st.success(f"✅ {result['rows_loaded']} filas importadas")
-                    recompute_cache()
+                job = ingest_csv(uploaded_file, mode="append" if append else "replace")
+            if job:
+                status = st.empty()
+                # el backend procesa el CSV en segundo plano: consultar el job hasta que termine
+                while job and job["status"] in ("queued", "running"):
+                    status.info(f"⏳ Procesando... {job['rows_read']:,} filas leídas")
+                    time.sleep(1)
+                    job = get_ingest_job(job["job_id"])
+                if job is None:
+                    status.warning("No se pudo consultar el estado de la importación")
+                elif job["status"] == "done":
+                    # los datos cambiaron: las respuestas cacheadas ya no valen
+                    invalidate_cache()
+                    status.success(f"✅ {job['rows_loaded']} filas importadas ({job.get('rows_skipped', 0)} duplicadas)")
                     st.rerun()
+                else:
+                    status.error(f"Error al importar: {job.get('error')}")
         
         st.markdown("---")
         
@@ -47,6 +66,46 @@ def render_sidebar():
                 st.info(f"{emoji} {sentiment.upper()}\nScore: {score:.2f}")
 
 
+def render_segment_filters() -> dict:
+    """Filtros de aerolínea y fechas en el sidebar, compartidos por todas las vistas.
+
+    Devuelve los parámetros `airline`/`start`/`end`/`source` para los endpoints de métricas.
+    Los valores se guardan en session_state para conservarlos al cambiar de página.
+    """
+    data = api_call("/metrics/airlines") or {}
+    options = [None] + [a["airline"] for a in data.get("airlines", [])]
+    current = st.session_state.get("segment_airline")
+    with st.sidebar:
+        st.subheader("🔎 Segmento")
+        airline = st.selectbox("Aerolínea", options,
+                               index=options.index(current) if current in options else 0,
+                               format_func=lambda x: "Todas" if x is None else x)
+        st.session_state["segment_airline"] = airline
+        use_dates = st.checkbox("Filtrar por fechas", value=st.session_state.get("segment_use_dates", False))
+        st.session_state["segment_use_dates"] = use_dates
+        sources = {"label": "Etiquetas del dataset", "prediction": "Predicciones del modelo"}
+        current_source = st.session_state.get("segment_source", "label")
+        source = st.radio("Sentimiento", list(sources), index=list(sources).index(current_source),
+                          format_func=sources.get,
+                          help="Las predicciones se generan con POST /ingest/rescore")
+        st.session_state["segment_source"] = source
+        params = {"airline": airline, "source": source}
+        if use_dates:
+            # por defecto, las fechas del dataset (no las de hoy: el CSV de ejemplo es de 2015)
+            rng = data.get("date_range") or {}
+            if rng.get("start") and rng.get("end"):
+                default = (date.fromisoformat(rng["start"][:10]), date.fromisoformat(rng["end"][:10]))
+            else:
+                default = (date.today() - timedelta(days=30), date.today())
+            dates = st.date_input("Rango de fechas", value=st.session_state.get("segment_dates", default))
+            if isinstance(dates, (tuple, list)) and len(dates) == 2:
+                st.session_state["segment_dates"] = tuple(dates)
+                # el backend usa `end` exclusivo: sumar un día para incluir la fecha final
+                params["start"] = dates[0].isoformat()
+                params["end"] = (dates[1] + timedelta(days=1)).isoformat()
+    return params
+
+
 def render_header():
     """Renderiza el encabezado principal"""
     col1, col2 = st.columns([3, 1])
@@ -1,15 +1,19 @@
 import streamlit as st
 import pandas as pd
-from components.api import api_call
+from components.api import get_dashboard
 from components.charts import create_sentiment_pie
-from components.ui import render_metrics
+from components.ui import render_metrics, render_segment_filters
 
 st.set_page_config(page_title="Resumen", page_icon="📊")
 
+segment = render_segment_filters()
+
 st.header("📊 Resumen de Sentimiento")
 st.markdown("Proporciones y KPI de sentimiento general")
 
-data = api_call("/metrics/summary")
+# una sola llamada para todo el resumen (304 si los datos no han cambiado)
+dashboard = get_dashboard({**segment, "keywords_top": 10, "influencers_limit": 5, "geo_top": 5})
+data = dashboard.get("summary") if dashboard else None
 if data:
     total = data.get("total_tweets", 0)
     sentiments = data.get("by_sentiment", {})
@@ -37,5 +41,19 @@ if data:
         df.columns = ["Sentimiento", "Cantidad"]
         df["Porcentaje"] = (df["Cantidad"] / total * 100).round(2)
         st.dataframe(df, use_container_width=True, hide_index=True)
+
+    # Vista rápida del resto de análisis (viene en la misma respuesta)
+    st.markdown("### Vista rápida")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.markdown("**Temas (negativos)**")
+        topics = dashboard.get("topics", {})
+        st.dataframe(pd.DataFrame(list(topics.items()), columns=["Tema", "Menciones"]), use_container_width=True, hide_index=True)
+    with col2:
+        st.markdown("**Palabras clave**")
+        st.dataframe(pd.DataFrame(dashboard.get("keywords", []), columns=["Palabra", "Frecuencia"]), use_container_width=True, hide_index=True)
+    with col3:
+        st.markdown("**Influencers**")
+        st.dataframe(pd.DataFrame(dashboard.get("influencers", [])), use_container_width=True, hide_index=True)
 else:
     st.info("No hay datos disponibles. Sube un CSV primero.")
@@ -2,9 +2,12 @@ import streamlit as st
 import pandas as pd
 from components.api import api_call
 from components.charts import create_time_series_chart
+from components.ui import render_segment_filters
 
 st.set_page_config(page_title="Evolución Temporal", page_icon="📈")
 
+segment = render_segment_filters()
+
 st.header("📈 Evolución del Sentimiento en el Tiempo")
 st.markdown("Observa cómo ha cambiado el sentimiento a lo largo del período")
 
@@ -14,7 +17,7 @@ with col1:
                        format_func=lambda x: {"D": "Diario", "W": "Semanal", "M": "Mensual"}[x],
                        help="D=Diario, W=Semanal, M=Mensual")
 
-data = api_call("/metrics/time_series", params={"freq": freq})
+data = api_call("/metrics/time_series", params={"freq": freq, **segment})
 if data and len(data) > 0:
     # Gráfico de líneas
     fig = create_time_series_chart(data)
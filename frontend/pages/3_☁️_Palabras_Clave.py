@@ -5,9 +5,12 @@ from wordcloud import WordCloud
 import matplotlib.pyplot as plt
 from components.api import api_call
 from components.charts import create_keywords_bar
+from components.ui import render_segment_filters
 
 st.set_page_config(page_title="Palabras Clave", page_icon="☁️")
 
+segment = render_segment_filters()
+
 st.header("☁️ Nube de Palabras Clave")
 st.markdown("Identifica rápidamente los temas principales de conversación")
 
@@ -19,7 +22,7 @@ with col1:
 with col2:
     top_n = st.slider("Top palabras", 10, 100, 50)
 
-data = api_call("/metrics/keywords", params={"sentiment": sentiment, "top": top_n})
+data = api_call("/metrics/keywords", params={"sentiment": sentiment, "top": top_n, **segment})
 if data and data.get("keywords"):
     keywords = data["keywords"]
     
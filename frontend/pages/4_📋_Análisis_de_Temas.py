@@ -2,9 +2,12 @@ import streamlit as st
 import pandas as pd
 from components.api import api_call
 from components.charts import create_horizontal_bar
+from components.ui import render_segment_filters
 
 st.set_page_config(page_title="Análisis de Temas", page_icon="📋")
 
+segment = render_segment_filters()
+
 st.header("📋 Análisis de Temas")
 st.markdown("Desglosa las menciones por subtema para entender mejor los problemas")
 
@@ -12,7 +15,7 @@ sentiment_filter = st.selectbox("Selecciona sentimiento a analizar",
                                ["negative", "positive", "neutral"],
                                format_func=lambda x: {"negative": "😞 Negativo", "positive": "😊 Positivo", "neutral": "😐 Neutral"}[x])
 
-data = api_call("/metrics/topics", params={"sentiment": sentiment_filter})
+data = api_call("/metrics/topics", params={"sentiment": sentiment_filter, **segment})
 if data and data.get("topics"):
     topics = data["topics"]
     
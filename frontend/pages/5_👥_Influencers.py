@@ -2,9 +2,12 @@ import streamlit as st
 import pandas as pd
 from components.api import api_call
 from components.charts import create_influencers_chart
+from components.ui import render_segment_filters
 
 st.set_page_config(page_title="Influencers", page_icon="👥")
 
+segment = render_segment_filters()
+
 st.header("👥 Identificación de Influencers y Detractores")
 st.markdown("Identifica usuarios con mayor impacto en las menciones")
 
@@ -21,7 +24,7 @@ with col3:
                           format_func=lambda x: "Cantidad de Menciones" if x == "count" else "Retweets")
 
 data = api_call("/metrics/influencers", 
-               params={"sentiment": sentiment, "limit": limit, "sort_by": sort_by})
+               params={"sentiment": sentiment, "limit": limit, "sort_by": sort_by, **segment})
 if data and data.get("influencers"):
     influencers = data["influencers"]
     df = pd.DataFrame(influencers)
@@ -3,16 +3,19 @@ import pandas as pd
 from components.api import api_call
 from components.charts import create_geo_chart
 from components.charts import create_geo_map
+from components.ui import render_segment_filters
 
 st.set_page_config(page_title="Análisis Geográfico", page_icon="🗺️")
 
+segment = render_segment_filters()
+
 st.header("🗺️ Análisis Geográfico de Menciones")
 st.markdown("Visualiza de dónde provienen las menciones geográficamente")
 
 top_n = st.slider("Mostrar top ubicaciones", 10, 100, 50, key="geo_top")
 
 
-data = api_call("/metrics/geo", params={"top": top_n})
+data = api_call("/metrics/geo", params={"top": top_n, **segment})
 if data and data.get("geo"):
     geo_data = data["geo"]
     df = pd.DataFrame(geo_data)
@@ -23,10 +26,9 @@ if data and data.get("geo"):
     
     # Tabla completa
     st.subheader(f"📍 Top {top_n} Ubicaciones")
-    df_display = df.copy()
-    df_display.columns = ["Ubicación", "Menciones"]
+    df_display = df.rename(columns={"location": "Ubicación", "count": "Menciones"})
     df_display["% del Total"] = (df_display["Menciones"] / df_display["Menciones"].sum() * 100).round(2)
-    st.dataframe(df_display, use_container_width=True, hide_index=True)
+    st.dataframe(df_display[["Ubicación", "Menciones", "% del Total"]], use_container_width=True, hide_index=True)
     
     # Estadísticas
     col1, col2, col3 = st.columns(3)
@@ -36,14 +38,15 @@ if data and data.get("geo"):
         st.metric("Ubicación Top", df_display.iloc[0]["Ubicación"])
     with col3:
         st.metric("Menciones Top", df_display.iloc[0]["Menciones"])
-else:
-    st.info("No hay datos geográficos disponibles")
-    
-st.subheader("🌍 Mapa geográfico de menciones")
 
-fig = create_geo_map(df_display)
+    st.subheader("🌍 Mapa geográfico de menciones")
 
-if fig:
-    st.plotly_chart(fig, use_container_width=True)
+    # lat/lon vienen resueltas por el backend; las ubicaciones sin coordenadas no se dibujan
+    fig = create_geo_map(df_display)
+
+    if fig:
+        st.plotly_chart(fig, use_container_width=True)
+    else:
+        st.info("Ninguna de las ubicaciones se pudo ubicar en el mapa.")
 else:
-    st.info("No se pudo generar el mapa. Asegúrate de que el CSV tenga columnas lat, lon, Ubicación y Menciones.")
+    st.info("No hay datos geográficos disponibles")
@@ -0,0 +1,293 @@
+# Benchmarks de rendimiento
+# Uso: python -m scripts.benchmark [preprocess metrics ingest predict train] [--rows 1M] [--json out.json]
+#      python -m scripts.benchmark --rows 100k --json new.json --baseline old.json
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+import numpy as np
+import pandas as pd
+from app.config import settings
+from app.core.cache import MemoryCache
+from app.core.geocoder import Geocoder
+from app.core.model import SentimentModel
+from app.core.preprocess import Preprocessor, _clean
+from app.core.store import DatasetStore, read_csv
+from app.services.ingest_service import IngestService
+from app.services.metrics_service import MetricsService
+from scripts.synth_data import parse_rows, write_corpus
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SECTIONS = ["preprocess", "metrics", "ingest", "predict", "train"]
+DEFAULT_SAMPLE = 100_000
+# CSVs sintéticos reutilizados entre ejecuciones (generar 10M filas lleva minutos)
+DEFAULT_CORPUS_DIR = Path(tempfile.gettempdir()) / "sentiment_bench"
+
+
+def _best_of(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _timed(fn: Callable[[], Any]) -> Tuple[float, Any]:
+    t0 = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - t0, result
+
+
+def bench_preprocess(texts: List[str], repeat: int = 3) -> Dict[str, float]:
+    """clean_text original vs camino rápido, texto a texto y por lotes, con el memo vacío y caliente."""
+    pre = Preprocessor()
+    reference = [pre.clean_text_reference(t) for t in texts]
+    if pre.clean_many(texts) != reference:
+        raise SystemExit("clean_many no coincide con la implementación original")
+
+    def cold(fn):
+        # memo vacío: mide el coste real de limpiar, no el de consultar la caché
+        def run():
+            _clean.cache_clear()
+            fn()
+        return run
+
+    results = {
+        "rows": len(texts),
+        "distinct": len(set(texts)),
+        "reference_s": _best_of(lambda: [pre.clean_text_reference(t) for t in texts], repeat),
+        "clean_text_cold_s": _best_of(cold(lambda: [pre.clean_text(t) for t in texts]), repeat),
+        "clean_many_cold_s": _best_of(cold(lambda: pre.clean_many(texts)), repeat),
+        "clean_text_memo_s": _best_of(lambda: [pre.clean_text(t) for t in texts], repeat),
+        "clean_many_memo_s": _best_of(lambda: pre.clean_many(texts), repeat),
+    }
+    for k in ("clean_text_cold_s", "clean_many_cold_s", "clean_text_memo_s", "clean_many_memo_s"):
+        results[k.replace("_s", "_speedup")] = results["reference_s"] / results[k]
+    return results
+
+
+def bench_metrics(csv_path: Path, workdir: Path, repeat: int = 3) -> Dict[str, Any]:
+    """Snapshot desde el CSV, carga en frío, warmup y cada métrica con la caché vacía (miss) y llena (hit)."""
+    store = DatasetStore(workdir / "metrics_store")
+    results: Dict[str, Any] = {}
+    results["snapshot_build_s"], df = _timed(lambda: store.build_from_csv(csv_path))
+    results["rows"] = len(df)
+    del df
+    svc = MetricsService(csv_path=csv_path, store=store,
+                         cache=MemoryCache(settings.CACHE_MAX_BYTES, settings.CACHE_TTL),
+                         geocoder=Geocoder(cache_path=workdir / "geocode_cache.json"))
+    results["load_s"], snap = _timed(svc._snapshot)
+    results["frame_mb"] = round(snap.df.memory_usage(deep=False).sum() / 2 ** 20, 1)
+    results["warmup_s"], _ = _timed(svc.warmup)
+
+    airline = str(snap.df['airline'].mode().iloc[0])
+    times = snap.df['tweet_created'].dropna()
+    midpoint = str(times.min() + (times.max() - times.min()) / 2)
+    calls = {
+        "summary": lambda: svc.sentiment_summary(),
+        "time_series_D": lambda: svc.sentiment_time_series('D'),
+        "time_series_h": lambda: svc.sentiment_time_series('h'),
+        "keywords": lambda: svc.top_keywords(),
+        "keywords_negative": lambda: svc.top_keywords('negative'),
+        "topics": lambda: svc.topic_breakdown(),
+        "influencers": lambda: svc.top_influencers(),
+        "geo": lambda: svc.geo_distribution(),
+        "airlines": lambda: svc.airline_counts(),
+        "summary_airline": lambda: svc.sentiment_summary(airline=airline),
+        "keywords_airline_range": lambda: svc.top_keywords(airline=airline, start=midpoint),
+        "dashboard": lambda: svc.dashboard(),
+    }
+    for name, fn in calls.items():
+        def miss(fn=fn):
+            svc.cache.clear()
+            fn()
+        results[f"{name}_miss_s"] = _best_of(miss, repeat)
+        results[f"{name}_hit_s"] = _best_of(fn, repeat)
+    results["cache"] = svc.cache.stats()
+    return results
+
+
+def bench_ingest(csv_path: Path, workdir: Path) -> Dict[str, Any]:
+    """ingest_stream del CSV completo en modo replace y después append (todo duplicado: mide el dedup)."""
+    ingest = IngestService(workdir / "ingest_store")
+    results: Dict[str, Any] = {}
+    for mode in ("replace", "append"):
+        with open(csv_path, "rb") as f:
+            elapsed, out = _timed(lambda: ingest.ingest_stream(f, mode))
+        rows = out["rows_loaded"] + out["rows_skipped"]
+        results[f"{mode}_s"] = elapsed
+        results[f"{mode}_rows_loaded"] = out["rows_loaded"]
+        results[f"{mode}_rows_per_sec"] = rows / elapsed if elapsed else 0.0
+    return results
+
+
+def bench_predict(texts: List[str], repeat: int = 3, single: int = 1000) -> Dict[str, Any]:
+    """Carga del modelo, latencia de predict() texto a texto y throughput de predict_batch()."""
+    model = SentimentModel()
+    results: Dict[str, Any] = {"rows": len(texts)}
+    results["load_s"], _ = _timed(model._ensure_loaded)
+    results["backend"] = "scorer" if model.scorer is not None else ("pipeline" if model.pipe is not None else "heuristic")
+    _clean.cache_clear()
+    latencies = []
+    for t in texts[:single]:
+        t0 = time.perf_counter()
+        model.predict(t)
+        latencies.append(time.perf_counter() - t0)
+    results["predict_p50_ms"] = statistics.median(latencies) * 1000
+    results["predict_p99_ms"] = float(np.percentile(latencies, 99)) * 1000
+
+    def batch():
+        _clean.cache_clear()
+        model.predict_batch(texts)
+    results["predict_batch_s"] = _best_of(batch, repeat)
+    results["predict_batch_rows_per_sec"] = len(texts) / results["predict_batch_s"]
+    return results
+
+
+def bench_train(csv_path: Path, rows: int) -> Dict[str, Any]:
+    """prepare_frame + fit del pipeline tfidf por defecto sobre las primeras `rows` filas."""
+    # sklearn solo se importa si se pide esta sección
+    from scripts.train import build_pipeline, prepare_frame
+    df = read_csv(csv_path, nrows=rows)
+    results: Dict[str, Any] = {}
+    results["prepare_s"], df = _timed(lambda: prepare_frame(df))
+    results["rows"] = len(df)
+    pipe = build_pipeline("tfidf")
+    X = df["text_clean"].to_numpy(dtype=object)
+    y = df["label_mapped"].to_numpy(dtype=object)
+    results["fit_s"], _ = _timed(lambda: pipe.fit(X, y))
+    return results
+
+
+def _git_commit() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10)
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                               capture_output=True, text=True, timeout=30).stdout.strip()
+        return out.stdout.strip() + ("-dirty" if dirty else "")
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float,
+            floor: float = 0.001) -> List[str]:
+    """Tiempos (`*_s`) que empeoran más de `tolerance` (0.25 = 25 %) respecto a `baseline`.
+
+    Los tiempos por debajo de `floor` segundos son ruido y no se comparan.
+    """
+    regressions = []
+    for section, values in results["results"].items():
+        old = baseline.get("results", {}).get(section, {})
+        for key, value in values.items():
+            if not key.endswith("_s") or not isinstance(old.get(key), (int, float)) or old[key] <= 0:
+                continue
+            if value < floor:
+                continue
+            ratio = value / old[key]
+            if ratio > 1 + tolerance:
+                regressions.append(f"{section}.{key}: {old[key]:.4f}s -> {value:.4f}s (x{ratio:.2f})")
+    return regressions
+
+
+def _print_section(name: str, values: Dict[str, Any]):
+    print(f"== {name} ==")
+    for k, v in values.items():
+        print(f"{k:>28}: {v:.4f}" if isinstance(v, float) else f"{k:>28}: {v}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks del backend")
+    parser.add_argument("sections", nargs="*", help="secciones a ejecutar (todas por defecto): " + ", ".join(SECTIONS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--rows", default=None,
+                        help="tamaño del dataset sintético (10k, 100k, 1M, 10M); por defecto el CSV del repo")
+    parser.add_argument("--seed", type=int, default=0, help="semilla del dataset sintético")
+    parser.add_argument("--corpus-dir", type=Path, default=DEFAULT_CORPUS_DIR,
+                        help="dónde se guardan (y reutilizan) los CSV sintéticos")
+    parser.add_argument("--sample", type=int, default=DEFAULT_SAMPLE,
+                        help="filas usadas por preprocess, predict y train (metrics e ingest usan todas)")
+    parser.add_argument("--json", type=Path, default=None, help="guardar los resultados en este JSON")
+    parser.add_argument("--baseline", type=Path, default=None, help="JSON de una ejecución anterior con el que comparar")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="empeoramiento tolerado frente a --baseline")
+    args = parser.parse_args()
+    sections = args.sections or SECTIONS
+    unknown = set(sections) - set(SECTIONS)
+    if unknown:
+        parser.error(f"secciones desconocidas: {', '.join(sorted(unknown))}")
+
+    if args.rows:
+        rows = parse_rows(args.rows)
+        csv_path = args.corpus_dir / f"synth_{rows}_{args.seed}.csv"
+        if not csv_path.exists():
+            print(f"Generando {rows} filas sintéticas en {csv_path}...")
+            write_corpus(csv_path, rows, args.seed)
+    else:
+        csv_path = settings.DATA_PATH
+
+    results: Dict[str, Any] = {}
+    texts: List[str] = []
+    if {"preprocess", "predict"} & set(sections):
+        texts = read_csv(csv_path, usecols=["text"], nrows=args.sample)["text"].astype(str).tolist()
+    with tempfile.TemporaryDirectory(prefix="bench-") as tmp:
+        workdir = Path(tmp)
+        for section in SECTIONS:
+            if section not in sections:
+                continue
+            if section == "preprocess":
+                results[section] = bench_preprocess(texts, args.repeat)
+            elif section == "metrics":
+                results[section] = bench_metrics(csv_path, workdir, args.repeat)
+            elif section == "ingest":
+                results[section] = bench_ingest(csv_path, workdir)
+            elif section == "predict":
+                results[section] = bench_predict(texts, args.repeat)
+            elif section == "train":
+                results[section] = bench_train(csv_path, args.sample)
+            _print_section(section, results[section])
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "corpus": str(csv_path),
+            "rows": args.rows,
+            "sample": args.sample,
+            "repeat": args.repeat,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            # ru_maxrss está en KB en Linux
+            "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1) if resource else None,
+        },
+        "results": results,
+    }
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2, default=str))
+        print(f"Resultados guardados en {args.json}")
+    if args.baseline:
+        regressions = compare(report, json.loads(args.baseline.read_text()), args.tolerance)
+        if regressions:
+            print("Regresiones respecto a", args.baseline)
+            for line in regressions:
+                print("  " + line)
+            sys.exit(1)
+        print("Sin regresiones respecto a", args.baseline)
+
+
+if __name__ == "__main__":
+    main()
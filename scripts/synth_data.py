@@ -0,0 +1,123 @@
+# Generador de datasets sintéticos con el mismo esquema que df_twitter_prueba4.csv
+# Uso: python -m scripts.synth_data 1M --out data/synth_1M.csv
+
+import argparse
+from pathlib import Path
+from typing import Dict
+import numpy as np
+import pandas as pd
+from app.config import settings
+from app.core.store import read_csv
+
+COLUMNS = ['tweet_id', 'airline_sentiment', 'airline_sentiment_confidence', 'negativereason',
+           'negativereason_confidence', 'airline', 'name', 'retweet_count', 'text', 'tweet_created',
+           'tweet_location', 'user_timezone', 'sentiment']
+HANDLES = {
+    "United": "@united", "US Airways": "@USAirways", "American": "@AmericanAir",
+    "Southwest": "@SouthwestAir", "Delta": "@JetBlue", "Virgin America": "@VirginAmerica",
+}
+MIN_WORDS, MAX_WORDS = 6, 24
+SUFFIXES = {"k": 10 ** 3, "m": 10 ** 6}
+
+
+def parse_rows(value: str) -> int:
+    """`10k`, `1M`, `250000` -> número de filas."""
+    value = value.strip().lower().replace("_", "")
+    if value[-1:] in SUFFIXES:
+        return int(float(value[:-1]) * SUFFIXES[value[-1]])
+    return int(value)
+
+
+def _distribution(s: pd.Series):
+    freq = s.value_counts(normalize=True, dropna=False)
+    return freq.index.to_numpy(dtype=object), freq.to_numpy(dtype=np.float64)
+
+
+class CorpusModel:
+    """Distribuciones sacadas del CSV semilla: etiquetas, aerolíneas, ubicaciones y palabras por sentimiento."""
+
+    def __init__(self, seed_csv: Path | None = None):
+        df = read_csv(seed_csv or settings.DATA_PATH)
+        df = df[df['airline_sentiment'].isin(["negative", "neutral", "positive"])]
+        self.sentiments, self.sentiment_p = _distribution(df['airline_sentiment'])
+        self.airlines, self.airline_p = _distribution(df['airline'])
+        self.locations, self.location_p = _distribution(df['tweet_location'])
+        self.timezones, self.timezone_p = _distribution(df['user_timezone'])
+        self.reasons, self.reason_p = _distribution(df.loc[df['airline_sentiment'] == "negative", 'negativereason'])
+        created = pd.to_datetime(df['tweet_created'], errors='coerce').dropna()
+        self.t0, self.t1 = created.min(), created.max()
+        # palabras de los tweets de cada sentimiento, sin las menciones (se añade la de la aerolínea)
+        self.words: Dict[str, np.ndarray] = {}
+        for label in self.sentiments:
+            tokens = df.loc[df['airline_sentiment'] == label, 'text'].astype(str).str.split().explode()
+            # sin `;` ni comillas: el CSV tiene que leerse también con quoting=3 (scripts.train)
+            tokens = tokens[~tokens.str.startswith("@")].str.replace(r'[;"]', "", regex=True)
+            tokens = tokens[tokens.str.len() > 0]
+            self.words[label] = tokens.to_numpy(dtype=object)
+
+    def sample(self, rows: int, rng: np.random.Generator, first_id: int = 0, users: int = 0) -> pd.DataFrame:
+        sentiment = rng.choice(self.sentiments, size=rows, p=self.sentiment_p)
+        airline = rng.choice(self.airlines, size=rows, p=self.airline_p)
+        lengths = rng.integers(MIN_WORDS, MAX_WORDS + 1, size=rows)
+        text = np.empty(rows, dtype=object)
+        for label, pool in self.words.items():
+            idx = np.flatnonzero(sentiment == label)
+            words = pool[rng.integers(0, len(pool), size=(len(idx), MAX_WORDS))].tolist()
+            text[idx] = [" ".join(w[:n]) for w, n in zip(words, lengths[idx])]
+        handles = pd.Series(airline).map(HANDLES).fillna("@airline").to_numpy(dtype=object)
+        negative = sentiment == "negative"
+        reason = np.full(rows, None, dtype=object)
+        reason[negative] = rng.choice(self.reasons, size=int(negative.sum()), p=self.reason_p)
+        span = int((self.t1 - self.t0).total_seconds())
+        created = self.t0 + pd.to_timedelta(rng.integers(0, span + 1, size=rows), unit="s")
+        # usuarios con actividad muy desigual, como en el dataset real
+        users = users or max(rows // 2, 1000)
+        name = np.char.add("user", (rng.zipf(1.3, size=rows) % users).astype(str))
+        return pd.DataFrame({
+            'tweet_id': np.arange(first_id, first_id + rows, dtype=np.int64) + 570000000000000000,
+            'airline_sentiment': sentiment,
+            'airline_sentiment_confidence': rng.integers(0, 10000, size=rows),
+            'negativereason': reason,
+            'negativereason_confidence': np.where(negative, rng.integers(0, 10000, size=rows), 0),
+            'airline': airline,
+            'name': name,
+            'retweet_count': rng.poisson(0.08, size=rows),
+            'text': handles + " " + text,
+            'tweet_created': created,
+            'tweet_location': rng.choice(self.locations, size=rows, p=self.location_p),
+            'user_timezone': rng.choice(self.timezones, size=rows, p=self.timezone_p),
+            'sentiment': None,
+        }, columns=COLUMNS)
+
+
+def write_corpus(out: Path, rows: int, seed: int = 0, chunk_rows: int = 200_000,
+                 model: CorpusModel | None = None) -> Path:
+    """Escribe `rows` filas sintéticas en `out` (`;`), por chunks para no tenerlas todas en memoria."""
+    model = model or CorpusModel()
+    rng = np.random.default_rng(seed)
+    out = Path(out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_suffix(".tmp")
+    users = max(rows // 2, 1000)
+    for start in range(0, rows, chunk_rows):
+        chunk = model.sample(min(chunk_rows, rows - start), rng, first_id=start, users=users)
+        chunk.to_csv(tmp, sep=";", index=False, mode="w" if start == 0 else "a", header=start == 0)
+    tmp.replace(out)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera un CSV sintético con el esquema del dataset de tweets")
+    parser.add_argument("rows", help="número de filas (10k, 100k, 1M, 10M...)")
+    parser.add_argument("--out", type=Path, default=None, help="CSV de salida (por defecto synth_<rows>.csv)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-rows", type=int, default=200_000)
+    args = parser.parse_args()
+    rows = parse_rows(args.rows)
+    out = args.out or Path(f"synth_{args.rows}.csv")
+    write_corpus(out, rows, args.seed, args.chunk_rows)
+    print(f"{rows} filas escritas en {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,37 @@
 ﻿# Training script (placeholder)
 
 from pathlib import Path
+import argparse
+import json
+import tempfile
+import time
+import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.pipeline import Pipeline
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import LogisticRegression
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer, TfidfVectorizer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.naive_bayes import ComplementNB
 import joblib
+from joblib import Parallel, delayed
 from app.config import settings
+from app.core.linear_model import LinearScorer, export_pipeline
 from app.core.preprocess import Preprocessor
 
-def load_data(path: Path):
-    df = pd.read_csv(
-    settings.DATA_PATH,
+CSV_OPTIONS = dict(
     sep=";",
     encoding="latin1",
-    engine="python",
     quoting=3,   # Ignora comillas problemáticas
     on_bad_lines="skip"   # evita filas rotas
 )
+LABELS = ["negative", "neutral", "positive"]
+
+def load_data(path: Path):
+    df = pd.read_csv(settings.DATA_PATH, engine="python", **CSV_OPTIONS)
+    return prepare_frame(df)
 
+def prepare_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Columnas text_clean y label_mapped a partir de un export crudo (o un chunk)."""
     # identificar columnas
     text_col = "text" if "text" in df.columns else df.columns[0]
     label_col = None
@@ -30,33 +42,253 @@ def load_data(path: Path):
     if label_col is None:
         raise ValueError("No se encontró columna de etiquetas")
     df = df[[text_col, label_col]].dropna()
-    df["text_clean"] = df[text_col].astype(str).map(Preprocessor().clean_text)
+    df["text_clean"] = Preprocessor().clean_many(df[text_col].astype(str))
     # map labels to positive/neutral/negative if necessary
     df["label_mapped"] = df[label_col].astype(str).str.lower().map(
         lambda x: "positive" if "pos" in x else ("negative" if "neg" in x else ("neutral" if "neu" in x else x))
     )
     return df
 
-def train_and_save():
+VARIANTS = ("tfidf", "hashing")
+DEFAULT_N_FEATURES = 2 ** 18
+
+def build_pipeline(variant: str = "tfidf", n_features: int = DEFAULT_N_FEATURES) -> Pipeline:
+    """tfidf: vocabulario aprendido (20k términos). hashing: sin vocabulario, n_features columnas fijas."""
+    if variant == "hashing":
+        # alternate_sign=False y norm=None: el TfidfTransformer recibe conteos, como con TfidfVectorizer
+        return Pipeline([
+            ("hash", HashingVectorizer(ngram_range=(1,2), n_features=n_features, alternate_sign=False, norm=None)),
+            ("tfidf", TfidfTransformer()),
+            ("clf", LogisticRegression(max_iter=1000))
+        ])
+    return Pipeline([
+        ("tfidf", TfidfVectorizer(ngram_range=(1,2), max_features=20000)),
+        ("clf", LogisticRegression(max_iter=1000))
+    ])
+
+def train_and_save(variant: str = "tfidf", n_features: int = DEFAULT_N_FEATURES, out_path: Path | None = None,
+                   compress: int = 0):
     path = settings.DATA_PATH
     if not path.exists():
         print("CSV no encontrado en:", path)
         return
     df = load_data(path)
-    X = df["text_clean"].values
-    y = df["label_mapped"].values
+    X = df["text_clean"].to_numpy(dtype=object)
+    y = df["label_mapped"].to_numpy(dtype=object)
     X_train, X_test, y_train, y_test = train_test_split(X, y, stratify=y, test_size=0.2, random_state=42)
-    pipe = Pipeline([
-        ("tfidf", TfidfVectorizer(ngram_range=(1,2), max_features=20000)),
-        ("clf", LogisticRegression(max_iter=1000))
-    ])
-    print("Entrenando modelo...")
+    pipe = build_pipeline(variant, n_features)
+    print(f"Entrenando modelo ({variant})...")
     pipe.fit(X_train, y_train)
     print("Accuracy en test:", pipe.score(X_test, y_test))
-    out_path = settings.MODEL_PATH
+    out_path = save_model(pipe, out_path, compress)
+    if variant == "tfidf":
+        export_model(out_path, X)
+
+def save_model(pipe: Pipeline, out_path: Path | None = None, compress: int = 0):
+    out_path = Path(out_path) if out_path else settings.MODEL_PATH
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    joblib.dump(pipe, out_path)
-    print("Modelo guardado en:", out_path)
+    # sin comprimir el servidor puede cargar el modelo con mmap; comprimido ocupa menos
+    # (en hashing coef_/idf_ son densos de n_features columnas, casi todo ceros/constantes)
+    joblib.dump(pipe, out_path, compress=compress)
+    print("Modelo guardado en:", out_path, f"({out_path.stat().st_size / 1024:.0f} KB)")
+    return out_path
+
+def export_model(model_path: Path | None = None, texts=None, tol: float = 1e-9) -> Path:
+    """Exporta el pipeline a `<modelo>.npz` para el scorer en NumPy y comprueba la paridad.
+
+    Compara predict_proba del pipeline y del scorer sobre `texts` (por defecto el
+    dataset limpio); si difieren más de `tol` borra el artefacto y falla.
+    """
+    model_path = Path(model_path) if model_path else settings.MODEL_PATH
+    pipe = joblib.load(model_path)
+    out = export_pipeline(pipe, model_path.with_suffix(".npz"), source=model_path)
+    if texts is None:
+        texts = load_data(settings.DATA_PATH)["text_clean"].to_numpy(dtype=object)
+    texts = list(texts) + ["", "ok", "Ünïcödé ℌ text"]
+    expected = pipe.predict_proba(texts)
+    got = LinearScorer.load(out).predict_proba(texts)
+    diff = float(np.abs(expected - got).max())
+    same = bool((expected.argmax(axis=1) == got.argmax(axis=1)).all())
+    if diff > tol or not same:
+        out.unlink()
+        raise SystemExit(f"Paridad fallida: diferencia máxima {diff:.2e}, mismas etiquetas: {same}")
+    print(f"Artefacto exportado en: {out} ({out.stat().st_size / 1024:.0f} KB), "
+          f"paridad OK en {len(texts)} textos (diferencia máxima {diff:.2e})")
+    return out
+
+def _holdout_mask(texts: pd.Series, holdout: float) -> np.ndarray:
+    # por hash del texto: la misma fila cae siempre del mismo lado, en cada chunk y en cada época
+    h = pd.util.hash_pandas_object(texts, index=False).to_numpy()
+    return (h % 10000) < holdout * 10000
+
+def train_stream(path: Path | None = None, n_features: int = DEFAULT_N_FEATURES, chunk_rows: int = 50000,
+                 epochs: int = 5, holdout: float = 0.2, out_path: Path | None = None, compress: int = 0):
+    """Entrenamiento out-of-core: chunks del CSV, espacio hasheado y SGDClassifier.partial_fit.
+
+    Solo un chunk está en memoria a la vez. Las filas de holdout nunca se entrenan;
+    su accuracy se acumula chunk a chunk con el modelo de ese momento.
+    """
+    path = Path(path) if path else settings.DATA_PATH
+    if not path.exists():
+        print("CSV no encontrado en:", path)
+        return
+    # sin idf: un TfidfTransformer necesita ver todo el corpus antes de transformar
+    vec = HashingVectorizer(ngram_range=(1,2), n_features=n_features, alternate_sign=False, norm="l2")
+    clf = SGDClassifier(loss="log_loss", alpha=1e-5, random_state=42)
+    for epoch in range(1, epochs + 1):
+        correct = total = trained = 0
+        for chunk in pd.read_csv(path, chunksize=chunk_rows, **CSV_OPTIONS):
+            df = prepare_frame(chunk)
+            df = df[df["label_mapped"].isin(LABELS)]
+            if df.empty:
+                continue
+            X = vec.transform(df["text_clean"].to_numpy(dtype=object))
+            y = df["label_mapped"].to_numpy(dtype=object)
+            test = _holdout_mask(df["text_clean"], holdout)
+            if (~test).any():
+                clf.partial_fit(X[~test], y[~test], classes=LABELS)
+                trained += int((~test).sum())
+            if test.any() and trained:
+                correct += int((clf.predict(X[test]) == y[test]).sum())
+                total += int(test.sum())
+            acc = correct / total if total else float("nan")
+            print(f"época {epoch} | filas entrenadas {trained} | holdout {total} | accuracy acumulada {acc:.4f}")
+    if not trained:
+        print("No hay filas etiquetadas para entrenar")
+        return
+    print("Accuracy en holdout:", correct / total if total else float("nan"))
+    save_model(Pipeline([("hash", vec), ("clf", clf)]), out_path, compress)
+
+SEARCH_VECTORIZERS = {
+    "tfidf-1g-20k": lambda: [("tfidf", TfidfVectorizer(ngram_range=(1,1), max_features=20000))],
+    "tfidf-2g-20k": lambda: [("tfidf", TfidfVectorizer(ngram_range=(1,2), max_features=20000))],
+    "tfidf-2g-50k": lambda: [("tfidf", TfidfVectorizer(ngram_range=(1,2), max_features=50000))],
+    "hash-2g-2^16": lambda: build_pipeline("hashing", 2 ** 16).steps[:-1],
+    "hash-2g-2^18": lambda: build_pipeline("hashing", 2 ** 18).steps[:-1],
+}
+SEARCH_CLASSIFIERS = {
+    "logreg-C1": lambda: LogisticRegression(max_iter=1000),
+    "logreg-C4": lambda: LogisticRegression(C=4, max_iter=1000),
+    "sgd-log": lambda: SGDClassifier(loss="log_loss", alpha=1e-5, random_state=42),
+    "cnb": lambda: ComplementNB(),
+}
+
+def search_candidates(cache_dir: str | None = None) -> list:
+    """Rejilla vectorizador x clasificador para `search`.
+
+    Con `memory`, el ajuste del vectorizador se cachea en disco; `warm_vectorizers`
+    lo llena antes de lanzar la rejilla para que los candidatos que comparten
+    configuración lo lean en vez de ajustarlo cada uno a la vez.
+    """
+    return [(f"{vn}+{cn}", Pipeline(vec() + [("clf", clf())], memory=cache_dir))
+            for vn, vec in SEARCH_VECTORIZERS.items() for cn, clf in SEARCH_CLASSIFIERS.items()]
+
+def _fit_vectorizer(vec_steps: list, cache_dir: str, X_train, y_train):
+    # mismo Pipeline sin clasificador: deja en `memory` el ajuste de cada paso
+    Pipeline(vec_steps + [("clf", "passthrough")], memory=cache_dir).fit(X_train, y_train)
+
+def warm_vectorizers(cache_dir: str, X_train, y_train, n_jobs: int = -1):
+    """Ajusta una sola vez cada configuración de vectorizador (en paralelo entre configuraciones)."""
+    Parallel(n_jobs=n_jobs)(
+        delayed(_fit_vectorizer)(vec(), cache_dir, X_train, y_train) for vec in SEARCH_VECTORIZERS.values()
+    )
+
+def _latency_ms(fn, repeat: int) -> float:
+    """Mediana en ms de `repeat` llamadas."""
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return float(np.median(times) * 1000)
+
+def fit_candidate(name: str, pipe: Pipeline, X_train, y_train, X_test, y_test):
+    """Ajusta y puntúa un candidato (se ejecuta en los procesos del pool)."""
+    t0 = time.perf_counter()
+    pipe.fit(X_train, y_train)
+    fit_sec = time.perf_counter() - t0
+    accuracy = float(pipe.score(X_test, y_test))
+    # el tamaño y la latencia se miden sin la caché de ajuste
+    pipe.memory = None
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "model.joblib"
+        joblib.dump(pipe, path)
+        size = path.stat().st_size
+    result = {"candidate": name, "accuracy": round(accuracy, 4), "fit_sec": round(fit_sec, 3), "model_bytes": size}
+    return result, pipe
+
+def measure_latency(pipe: Pipeline, X_test, samples: int = 200, batch_size: int = 256) -> dict:
+    singles = iter(np.resize(X_test, samples))
+    batch = np.resize(X_test, batch_size)
+    single_ms = _latency_ms(lambda: pipe.predict_proba([next(singles)]), samples)
+    batch_ms = _latency_ms(lambda: pipe.predict_proba(batch), max(samples // 20, 3))
+    return {
+        "single_predict_ms": round(single_ms, 3),
+        "batch_predict_ms": round(batch_ms, 3),
+        "batch_size": batch_size,
+        "batch_per_text_ms": round(batch_ms / batch_size, 4),
+    }
+
+def search(n_jobs: int = -1, cache_dir: Path | None = None, report: Path | None = None, samples: int = 200) -> list:
+    """Entrena la rejilla en paralelo y escribe un informe JSON de calidad vs velocidad."""
+    path = settings.DATA_PATH
+    if not path.exists():
+        print("CSV no encontrado en:", path)
+        return []
+    # limpieza una sola vez, en el proceso principal
+    df = load_data(path)
+    X = df["text_clean"].to_numpy(dtype=object)
+    y = df["label_mapped"].to_numpy(dtype=object)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, stratify=y, test_size=0.2, random_state=42)
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = str(cache_dir or tmp)
+        # sin este paso, los candidatos que corren a la vez fallan todos la caché y ajustan el mismo vectorizador
+        print(f"Ajustando {len(SEARCH_VECTORIZERS)} vectorizadores...")
+        warm_vectorizers(cache, X_train, y_train, n_jobs)
+        candidates = search_candidates(cache)
+        print(f"Evaluando {len(candidates)} candidatos (n_jobs={n_jobs})...")
+        fitted = Parallel(n_jobs=n_jobs)(
+            delayed(fit_candidate)(name, pipe, X_train, y_train, X_test, y_test)
+            for name, pipe in candidates
+        )
+    # latencias de uno en uno en este proceso: medidas en paralelo se pisarían entre sí
+    results = [{**result, **measure_latency(pipe, X_test, samples)} for result, pipe in fitted]
+    results.sort(key=lambda r: r["accuracy"], reverse=True)
+    report = Path(report) if report else Path("train_search_report.json")
+    report.write_text(json.dumps({"data": str(path), "train_rows": len(X_train), "test_rows": len(X_test),
+                                  "results": results}, indent=2))
+    print(f"{'candidato':<26}{'acc':>8}{'fit s':>8}{'KB':>8}{'1 ms':>8}{'lote ms':>9}")
+    for r in results:
+        print(f"{r['candidate']:<26}{r['accuracy']:>8.4f}{r['fit_sec']:>8.2f}{r['model_bytes'] / 1024:>8.0f}"
+              f"{r['single_predict_ms']:>8.2f}{r['batch_predict_ms']:>9.2f}")
+    print("Informe guardado en:", report)
+    return results
 
 if __name__ == "__main__":
-    train_and_save()
+    parser = argparse.ArgumentParser(description="Entrena el modelo de sentimiento")
+    parser.add_argument("--variant", choices=VARIANTS, default="tfidf")
+    parser.add_argument("--n-features", type=int, default=DEFAULT_N_FEATURES, help="columnas del HashingVectorizer")
+    parser.add_argument("--out", type=Path, default=None, help="ruta del modelo (por defecto MODEL_PATH)")
+    parser.add_argument("--compress", type=int, default=0, help="nivel de compresión de joblib (0-9); desactiva el mmap al cargar")
+    parser.add_argument("--stream", action="store_true", help="entrenar por chunks con SGDClassifier.partial_fit (sin cargar el CSV entero)")
+    parser.add_argument("--data", type=Path, default=None, help="CSV de entrenamiento para --stream (por defecto DATA_PATH)")
+    parser.add_argument("--chunk-rows", type=int, default=50000)
+    parser.add_argument("--epochs", type=int, default=5, help="pasadas sobre el CSV en --stream")
+    parser.add_argument("--holdout", type=float, default=0.2, help="fracción de filas reservada para evaluar en --stream")
+    commands = parser.add_subparsers(dest="command")
+    search_parser = commands.add_parser("search", help="rejilla de modelos en paralelo con informe de precisión y latencia")
+    search_parser.add_argument("--n-jobs", type=int, default=-1)
+    search_parser.add_argument("--cache-dir", type=Path, default=None, help="caché de Pipeline(memory=...) (temporal por defecto)")
+    search_parser.add_argument("--report", type=Path, default=None, help="informe JSON (train_search_report.json por defecto)")
+    search_parser.add_argument("--samples", type=int, default=200, help="llamadas individuales para medir la latencia")
+    export_parser = commands.add_parser("export", help="exporta el modelo a .npz para el scorer en NumPy (con chequeo de paridad)")
+    export_parser.add_argument("--model", type=Path, default=None, help="modelo .joblib (por defecto MODEL_PATH)")
+    args = parser.parse_args()
+    if args.command == "search":
+        search(args.n_jobs, args.cache_dir, args.report, args.samples)
+    elif args.command == "export":
+        export_model(args.model)
+    elif args.stream:
+        train_stream(args.data, args.n_features, args.chunk_rows, args.epochs, args.holdout, args.out, args.compress)
+    else:
+        train_and_save(args.variant, args.n_features, args.out, args.compress)